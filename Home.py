@@ -1,6 +1,5 @@
+import markdown
 import streamlit as st
-from pathlib import Path
-from PIL import Image
 
 # === CONFIGURAÇÃO DA PÁGINA ===
 # Deve ser o primeiro comando Streamlit no seu script
@@ -14,11 +13,11 @@ st.set_page_config(
 # === LÓGICA DE LOGIN (APENAS PARA FEEDBACK VISUAL) ===
 # Adicionamos um feedback visual na barra lateral se o admin já estiver logado.
 # A página em si permanece pública.
-st.sidebar.title("Navegação")
-if st.session_state.get("authenticated", False):
-    st.sidebar.success("✅ Acesso de Administrador Ativo")
-else:
-    st.sidebar.info("Selecione uma página para começar.")
+is_admin = bool(st.session_state.get("authenticated", False))
+
+# Título e status em um único elemento da barra lateral.
+sidebar_status = "✅ **Acesso de Administrador Ativo**" if is_admin else "ℹ️ Selecione uma página para começar."
+st.sidebar.markdown(f"### Navegação\n\n{sidebar_status}")
 
 
 # === CSS SIMPLES (do seu script original) ===
@@ -42,45 +41,43 @@ st.markdown(
     unsafe_allow_html=True,
 )
 
-# === UTILIDADES (do seu script original) ===
-@st.cache_data(show_spinner=False)
-def load_image(path: str):
-    """Carrega imagem com cache para melhorar performance."""
-    p = Path(path)
-    if p.exists():
-        return Image.open(p)
-    return None
-
-def safe_image_display(img, caption=None):
-    """Exibe imagem com fallback em caso de erro."""
-    if img:
-        st.image(img, use_container_width=True, caption=caption)
-    else:
-        # Garanta que você tenha um arquivo "Capa.png" no mesmo diretório
-        st.warning("Imagem 'Capa.png' não encontrada. Verifique o caminho do arquivo.")
+# === BANNER ===
+# A imagem é servida pelo servidor de arquivos estáticos do Streamlit
+# (server.enableStaticServing) e fica no cache HTTP do navegador: nenhuma
+# decodificação ou codificação acontece a cada rerun.
+BANNER_HTML = """
+<figure style="margin:0;">
+    <img src="app/static/Capa.webp" width="728" height="582" style="width:100%; height:auto;" alt="Programa +GEMS">
+    <figcaption class="muted" style="text-align:center;">Celebre, reconheça e conquiste.</figcaption>
+</figure>
+"""
 
 # === CABEÇALHO E CONTEÚDO PRINCIPAL (do seu script original) ===
+# Título, subtítulo e texto em um único bloco: um elemento por rerun em vez de quatro.
+HERO_MD = """
+<div class="hero-title">💎 Bem-vindo ao Programa +GEMS</div>
+
+**Sua jornada de reconhecimento e missões começa aqui.**
+
+Este é o nosso universo de gamificação, criado para **valorizar cada conquista**
+e fortalecer o espírito de equipe.
+
+Aqui, cada Cristal representa um reconhecimento, e cada Herói é uma peça
+fundamental da nossa história.
+
+---
+
+**As páginas com os ícones 👑 e 🔑 na barra lateral requerem senha de administrador.**
+"""
+# Convertido para HTML uma única vez, na importação; as reruns não reprocessam o markdown.
+_HERO_HTML = markdown.markdown(HERO_MD)
+
 hero_col, banner_col = st.columns([1.5, 1], gap="large")
 with hero_col:
-    st.markdown('<div class="hero-title">💎 Bem-vindo ao Programa +GEMS</div>', unsafe_allow_html=True)
-    st.markdown("**Sua jornada de reconhecimento e missões começa aqui.**")
-    st.write("")
-    st.markdown(
-        """
-        Este é o nosso universo de gamificação, criado para **valorizar cada conquista**
-        e fortalecer o espírito de equipe.
+    st.html(_HERO_HTML)
 
-        Aqui, cada Cristal representa um reconhecimento, e cada Herói é uma peça 
-        fundamental da nossa história.
-        
-        ---
-        
-        **As páginas com os ícones 👑 e 🔑 na barra lateral requerem senha de administrador.**
-        """
-    )
-    
 
 with banner_col:
-    # Tente carregar a imagem. Certifique-se de que o arquivo "Capa.png" existe!
-    img = load_image("Capa.png")
-    safe_image_display(img, caption="Celebre, reconheça e conquiste.")
\ No newline at end of file
+    # Gere "static/Capa.webp" com: python scripts/build_assets.py
+    # HTML puro: st.html dispensa o parser de markdown.
+    st.html(BANNER_HTML)
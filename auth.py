@@ -2,11 +2,24 @@
 
 import streamlit as st
 import os
+import hmac
 from dotenv import load_dotenv
 
 # Garante que as variáveis de ambiente sejam carregadas
 load_dotenv()
 
+# Lida uma única vez, na importação do módulo, e não a cada rerun das páginas.
+ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD")
+
+def is_correct_password(password_input):
+    """
+    Confere a senha de administrador. A comparação é feita em tempo constante
+    (hmac.compare_digest), sem revelar pelo tempo de resposta quantos caracteres acertou.
+    """
+    if not ADMIN_PASSWORD:
+        return False
+    return hmac.compare_digest(password_input.encode("utf-8"), ADMIN_PASSWORD.encode("utf-8"))
+
 def check_password():
     """
     Mostra um formulário de login e retorna True se a senha estiver correta.
@@ -23,9 +36,7 @@ def check_password():
     password_input = st.text_input("Senha", type="password", key="password_input")
 
     if st.button("Entrar"):
-        correct_password = os.getenv("ADMIN_PASSWORD")
-        
-        if correct_password and password_input == correct_password:
+        if is_correct_password(password_input):
             # Se a senha estiver correta, marca como autenticado e recarrega a página.
             st.session_state["authenticated"] = True
             st.session_state["password_input"] = "" # Limpa o campo
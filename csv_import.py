@@ -0,0 +1,26 @@
+# csv_import.py
+
+import streamlit as st
+import pandas as pd
+
+def read_import_csv(csv_file, columns):
+    """
+    Lê o CSV de importação das páginas de administração e devolve só as linhas com
+    todas as `columns` preenchidas. Em caso de problema, avisa o usuário e retorna None.
+    """
+    try:
+        df_csv = pd.read_csv(csv_file, dtype=str)
+    except Exception as e:
+        st.error(f"Não foi possível ler o arquivo CSV: {e}")
+        return None
+    if not set(columns).issubset(df_csv.columns):
+        names = [f"`{c}`" for c in columns]
+        listed = names[0] if len(names) == 1 else f"{', '.join(names[:-1])} e {names[-1]}"
+        st.warning(f"O CSV precisa ter {'a coluna' if len(names) == 1 else 'as colunas'} {listed}.")
+        return None
+    df_csv = df_csv[columns].fillna('').apply(lambda col: col.str.strip())
+    df_csv = df_csv[(df_csv != '').all(axis=1)]
+    if df_csv.empty:
+        st.warning("Nenhuma linha válida encontrada no arquivo.")
+        return None
+    return df_csv
@@ -0,0 +1,131 @@
+# db.py
+
+import streamlit as st
+import pandas as pd
+import psycopg2
+from psycopg2 import pool, extensions
+import os
+import logging
+import threading
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+# Inicialização única do processo: o módulo é importado uma vez e fica em cache,
+# enquanto os scripts das páginas são reexecutados a cada interação.
+load_dotenv()
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+# Colunas bytea (imagens) chegam como `bytes` em vez de `memoryview`: assim os
+# DataFrames com imagens podem ser guardados pelo st.cache_data (que usa pickle).
+BYTEA_AS_BYTES = extensions.new_type(
+    psycopg2.BINARY.values, "BYTEA_AS_BYTES",
+    lambda value, cur: bytes(psycopg2.BINARY(value, cur)) if value is not None else None,
+)
+extensions.register_type(BYTEA_AS_BYTES)
+
+# Parâmetros de conexão lidos uma única vez, na importação do módulo.
+DB_CONN_KWARGS = {
+    "host": os.getenv("SUPABASE_HOST"),
+    "database": os.getenv("SUPABASE_DATABASE"),
+    "user": os.getenv("SUPABASE_USER"),
+    "password": os.getenv("SUPABASE_KEY"),
+    "port": os.getenv("SUPABASE_PORT"),
+}
+
+# Tamanho máximo do pool e quanto tempo uma sessão espera por uma conexão livre.
+POOL_MAX_CONN = 8
+POOL_WAIT_SECONDS = 30
+
+@st.cache_resource(show_spinner=False)
+def get_pool():
+    """
+    Cria o pool de conexões compartilhado por todas as páginas e sessões.
+    O handshake TCP/TLS com o Supabase acontece só quando o pool abre uma conexão nova.
+    """
+    return pool.ThreadedConnectionPool(minconn=1, maxconn=POOL_MAX_CONN, **DB_CONN_KWARGS)
+
+@st.cache_resource(show_spinner=False)
+def get_pool_slots():
+    """
+    Uma vaga por conexão do pool. O ThreadedConnectionPool lança PoolError assim que
+    as conexões se esgotam; com o semáforo, a sessão espera uma vaga ser liberada.
+    """
+    return threading.BoundedSemaphore(POOL_MAX_CONN)
+
+def _checkout_live_connection():
+    """
+    Pega uma conexão do pool testando-a antes (o "pre-ping"): o ThreadedConnectionPool
+    entrega conexões ociosas sem conferir, e o Supabase/pgbouncer pode tê-las encerrado.
+    Uma conexão morta é descartada e substituída por uma nova, uma única vez.
+    """
+    conn = get_pool().getconn()
+    try:
+        if conn.closed:
+            raise psycopg2.InterfaceError("conexão já encerrada")
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+        return conn
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        logging.info("Conexão ociosa do pool estava encerrada; abrindo outra.")
+        get_pool().putconn(conn, close=True)
+        return get_pool().getconn()
+
+@contextmanager
+def get_db_connection():
+    """
+    Empresta uma conexão do pool para um bloco `with`.
+    A conexão volta ao pool ao sair do bloco, mesmo se houver erro.
+    Com o pool ocupado, espera até `POOL_WAIT_SECONDS` por uma conexão livre.
+    Conexões encerradas pelo servidor são trocadas antes de chegar ao bloco.
+    """
+    slots = get_pool_slots()
+    if not slots.acquire(timeout=POOL_WAIT_SECONDS):
+        raise pool.PoolError("Nenhuma conexão livre no pool após a espera.")
+    try:
+        conn = _checkout_live_connection()
+    except Exception:
+        slots.release()
+        raise
+    broken = False
+    try:
+        yield conn
+    except Exception:
+        # Desfaz a transação aqui mesmo; se nem o rollback funcionar, a conexão
+        # está comprometida e é descartada em vez de voltar envenenada ao pool.
+        try:
+            conn.rollback()
+        except Exception:
+            broken = True
+        raise
+    finally:
+        try:
+            release_db_connection(conn, close=broken)
+        finally:
+            slots.release()
+
+def release_db_connection(conn, close=False):
+    """Devolve a conexão ao pool; conexões que caíram (ou marcadas com `close`) são descartadas."""
+    get_pool().putconn(conn, close=close or bool(conn.closed))
+
+# Linhas por ida ao servidor quando a leitura usa um cursor nomeado.
+FETCH_BATCH_SIZE = 2000
+
+def fetch_dataframe(conn, query, params=None, name=None, dtypes=None):
+    """
+    Executa a consulta e monta o DataFrame direto das linhas do cursor, sem o
+    adaptador genérico do pandas (que só suporta oficialmente SQLAlchemy).
+    Com `name`, usa um cursor do lado do servidor, que traz as linhas em lotes
+    de `FETCH_BATCH_SIZE` em vez de transferir o resultado inteiro de uma vez.
+    Com `dtypes` (coluna -> dtype), as colunas conhecidas recebem o tipo direto,
+    sem depender da inferência do pandas.
+    """
+    with conn.cursor(name=name) as cur:
+        if name:
+            cur.itersize = FETCH_BATCH_SIZE
+        cur.execute(query, params)
+        rows = list(cur) if name else cur.fetchall()
+        columns = [desc[0] for desc in cur.description]
+    df = pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+    if dtypes:
+        df = df.astype({col: dtype for col, dtype in dtypes.items() if col in df.columns})
+    return df
@@ -0,0 +1,10 @@
+-- =================================================================================
+-- Evidências das nomeações passam de texto Base64 para bytea
+-- =================================================================================
+-- O Base64 ocupa ~33% a mais no disco e na rede e exige codificar/decodificar a cada
+-- gravação e leitura. Os dados existentes são convertidos na própria migração.
+-- Execute uma única vez no SQL Editor do Supabase (ou via psql) antes de publicar o app.
+
+ALTER TABLE fact_nomination
+    ALTER COLUMN image TYPE bytea
+    USING decode(image, 'base64');
@@ -0,0 +1,10 @@
+-- =================================================================================
+-- Ícones dos pilares passam de texto Base64 para bytea
+-- =================================================================================
+-- Mesma mudança feita nas evidências das nomeações (001): sem codificação Base64 na
+-- gravação nem decodificação a cada renderização do Mapa e da administração.
+-- Execute uma única vez no SQL Editor do Supabase (ou via psql) antes de publicar o app.
+
+ALTER TABLE dim_pillar
+    ALTER COLUMN pillar_image TYPE bytea
+    USING decode(pillar_image, 'base64');
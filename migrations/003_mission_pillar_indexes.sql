@@ -0,0 +1,11 @@
+-- =================================================================================
+-- Índices para a listagem de missões por pilar
+-- =================================================================================
+-- A Administração de Missões e o Mapa dos Cristais juntam dim_mission com dim_pillar
+-- e ordenam por nome do pilar e da missão. O índice composto atende o JOIN pelo
+-- pillar_id já na ordem de mission_name (e a exclusão em cascata de um pilar, que
+-- hoje varre dim_mission inteira); o de pillar_name atende a ordenação dos pilares.
+-- Seguro para executar mais de uma vez no SQL Editor do Supabase (ou via psql).
+
+CREATE INDEX IF NOT EXISTS ix_mission_pillar_name ON dim_mission (pillar_id, mission_name);
+CREATE INDEX IF NOT EXISTS ix_pillar_name ON dim_pillar (pillar_name);
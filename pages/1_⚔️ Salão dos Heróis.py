@@ -1,15 +1,13 @@
 
 import streamlit as st
 import pandas as pd
-import psycopg2
-import os
-from dotenv import load_dotenv
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
+from db import get_db_connection, fetch_dataframe
 
 # --- Configuração Básica da Página e Estilos CSS ---
 st.set_page_config(layout="wide")
-load_dotenv()
 
 st.markdown("""
 <style>
@@ -58,51 +56,130 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-# --- Funções de Conexão e Busca de Dados ---
-def get_db_connection():
-    try:
-        return psycopg2.connect(
-            host=os.getenv("SUPABASE_HOST"), database=os.getenv("SUPABASE_DATABASE"),
-            user=os.getenv("SUPABASE_USER"), password=os.getenv("SUPABASE_KEY"),
-            port=os.getenv("SUPABASE_PORT")
-        )
-    except psycopg2.OperationalError as e:
-        st.error(f"Erro de conexão com o banco de dados: {e}")
+# --- Funções de Busca de Dados (conexões emprestadas do pool em db.py) ---
+def run_query(query, params=None):
+    """
+    Executa uma consulta de leitura e devolve um DataFrame.
+    Erros sobem para o show_page: o st.cache_data não guarda exceções, então a página
+    volta a funcionar assim que o banco responder, sem esperar o TTL dos caches.
+    """
+    with get_db_connection() as conn:
+        return fetch_dataframe(conn, query, params)
+
+# As agregações rodam no Postgres: só os totais (e não cada nomeação) trafegam pela rede.
+NOMINATIONS_FROM = """
+FROM fact_nomination AS fn
+JOIN dim_hero AS nominee ON fn.nominee_id = nominee.hero_id
+JOIN dim_hero AS nominator ON fn.nominator_id = nominator.hero_id
+JOIN dim_mission AS dm ON fn.mission_id = dm.mission_id
+JOIN dim_pillar AS dp ON dm.pillar_id = dp.pillar_id
+"""
+
+def build_filters(start, end, heroes, pillars):
+    """Monta a cláusula WHERE parametrizada a partir dos filtros da página."""
+    clauses, params = [], []
+    if start and end:
+        clauses.append("fn.created_at::date BETWEEN %s AND %s")
+        params += [start, end]
+    if heroes:
+        clauses.append("nominee.hero_name = ANY(%s)")
+        params.append(list(heroes))
+    if pillars:
+        clauses.append("dp.pillar_name = ANY(%s)")
+        params.append(list(pillars))
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where, params
+
+@st.cache_data(ttl="5m")
+def fetch_filter_options():
+    """Período e listas de heróis/pilares disponíveis para os filtros."""
+    df = run_query(f"""
+        SELECT MIN(fn.created_at)::date AS min_date, MAX(fn.created_at)::date AS max_date,
+               ARRAY_AGG(DISTINCT nominee.hero_name ORDER BY nominee.hero_name) AS heroes,
+               ARRAY_AGG(DISTINCT dp.pillar_name ORDER BY dp.pillar_name) AS pillars
+        {NOMINATIONS_FROM};
+    """)
+    if df.empty or pd.isna(df.at[0, 'min_date']):
         return None
+    return df.iloc[0].to_dict()
 
 @st.cache_data(ttl="5m")
-def load_dashboard_data():
-    conn = None
-    try:
-        conn = get_db_connection()
-        if conn:
-            query = """
-            SELECT fn.created_at AS nomination_date, nominee.hero_name, nominee.hero_team,
-                   nominator.hero_name AS nominator_name, dm.mission_name, dm.crystals_reward, dp.pillar_name
-            FROM fact_nomination AS fn
-            JOIN dim_hero AS nominee ON fn.nominee_id = nominee.hero_id
-            JOIN dim_hero AS nominator ON fn.nominator_id = nominator.hero_id
-            JOIN dim_mission AS dm ON fn.mission_id = dm.mission_id
-            JOIN dim_pillar AS dp ON dm.pillar_id = dp.pillar_id
-            ORDER BY fn.created_at DESC;
-            """
-            df = pd.read_sql_query(query, conn)
-            if not df.empty:
-                df['nomination_date'] = pd.to_datetime(df['nomination_date'])
-            return df
-        return pd.DataFrame()
-    except Exception as e:
-        st.error(f"Erro ao carregar dados do dashboard: {e}")
-        return pd.DataFrame()
-    finally:
-        if conn: conn.close()
+def fetch_kpis(start, end, heroes, pillars):
+    where, params = build_filters(start, end, heroes, pillars)
+    df = run_query(f"""
+        SELECT COUNT(DISTINCT nominee.hero_name) AS total_heroes,
+               COALESCE(SUM(dm.crystals_reward), 0) AS total_crystals,
+               COUNT(*) AS total_nominations
+        {NOMINATIONS_FROM} {where};
+    """, params)
+    return df.iloc[0].to_dict() if not df.empty else {'total_heroes': 0, 'total_crystals': 0, 'total_nominations': 0}
+
+@st.cache_data(ttl="5m")
+def fetch_feed(start, end, heroes, pillars, limit=20):
+    where, params = build_filters(start, end, heroes, pillars)
+    return run_query(f"""
+        SELECT fn.created_at AS nomination_date, nominee.hero_name, nominator.hero_name AS nominator_name,
+               dm.mission_name, dm.crystals_reward
+        {NOMINATIONS_FROM} {where}
+        ORDER BY fn.created_at DESC
+        LIMIT %s;
+    """, params + [limit])
+
+@st.cache_data(ttl="5m")
+def fetch_ranking(start, end, heroes, pillars):
+    where, params = build_filters(start, end, heroes, pillars)
+    return run_query(f"""
+        SELECT nominee.hero_name, nominee.hero_team, SUM(dm.crystals_reward) AS crystals_reward
+        {NOMINATIONS_FROM} {where}
+        GROUP BY nominee.hero_name, nominee.hero_team
+        ORDER BY crystals_reward DESC;
+    """, params)
+
+@st.cache_data(ttl="5m")
+def fetch_pillar_totals(start, end, heroes, pillars):
+    where, params = build_filters(start, end, heroes, pillars)
+    return run_query(f"""
+        SELECT dp.pillar_name, SUM(dm.crystals_reward) AS crystals_reward
+        {NOMINATIONS_FROM} {where}
+        GROUP BY dp.pillar_name;
+    """, params)
+
+@st.cache_data(ttl="5m")
+def fetch_sankey_edges(start, end, heroes, pillars):
+    """Cristais por (nomeador, pilar, nomeado); o diagrama deriva seus fluxos daqui."""
+    where, params = build_filters(start, end, heroes, pillars)
+    df = run_query(f"""
+        SELECT nominator.hero_name AS nominator_name, dp.pillar_name, nominee.hero_name,
+               SUM(dm.crystals_reward) AS crystals_reward
+        {NOMINATIONS_FROM} {where}
+        GROUP BY nominator.hero_name, dp.pillar_name, nominee.hero_name;
+    """, params)
+    # Nomes se repetem muito: como 'category', os groupby do Sankey operam sobre códigos inteiros.
+    for c in ('nominator_name', 'pillar_name', 'hero_name'):
+        if c in df:
+            df[c] = df[c].astype('category')
+    return df
+
+@st.cache_data(ttl="5m")
+def fetch_daily_crystals(start, end, heroes, pillars):
+    where, params = build_filters(start, end, heroes, pillars)
+    df = run_query(f"""
+        SELECT fn.created_at::date AS date_only, SUM(dm.crystals_reward) AS crystals_reward
+        {NOMINATIONS_FROM} {where}
+        GROUP BY date_only
+        ORDER BY date_only;
+    """, params)
+    if not df.empty:
+        # Converte os `date` do driver para datetime64 uma vez, ainda dentro do cache.
+        df['date_only'] = df['date_only'].astype('datetime64[ns]')
+    return df
 
 
 # --- Componentes de UI e Funções de Exibição ---
 
-def show_kpi_cards(df):
+def show_kpi_cards(kpis):
     st.markdown("### 📊 **Métricas do Reino**")
-    total_heroes, total_crystals, total_nominations = df['hero_name'].nunique(), int(df['crystals_reward'].sum()), len(df)
+    total_heroes, total_crystals, total_nominations = int(kpis['total_heroes']), int(kpis['total_crystals']), int(kpis['total_nominations'])
     icons, labels = ["🛡️", "💎", "📜"], ["Heróis Reconhecidos", "Cristais Distribuídos", "Total de Nomeações"]
     values = [total_heroes, f"{total_crystals:,}".replace(",", "."), total_nominations]
     cols = st.columns(3)
@@ -111,29 +188,40 @@ def show_kpi_cards(df):
 
 def show_recognition_feed(df):
     st.markdown("### 📜 **Feed de Reconhecimento**")
+    if df.empty:
+        st.info("Nenhuma nomeação para exibir no feed.")
+        return
+    # Datas formatadas de uma vez e todos os cards em um único st.markdown.
+    dates = pd.to_datetime(df['nomination_date']).dt.strftime("%d de %B, %Y")
+    feed_html = ''.join(
+        f'<div class="feed-card"><div class="feed-header">📅 {date}</div><div class="feed-body"><b>{hero}</b> foi reconhecido(a) por <b>{nominator}</b><br><small>🎯 Missão: <i>{mission}</i> (+{reward} 💎)</small></div></div>'
+        for date, hero, nominator, mission, reward in zip(dates, df['hero_name'], df['nominator_name'], df['mission_name'], df['crystals_reward'])
+    )
     with st.container(height=500, border=False):
-        for _, row in df.head(20).iterrows():
-            st.markdown(f'<div class="feed-card"><div class="feed-header">📅 {row["nomination_date"].strftime("%d de %B, %Y")}</div><div class="feed-body"><b>{row["hero_name"]}</b> foi reconhecido(a) por <b>{row["nominator_name"]}</b><br><small>🎯 Missão: <i>{row["mission_name"]}</i> (+{row["crystals_reward"]} 💎)</small></div></div>', unsafe_allow_html=True)
+        st.markdown(feed_html, unsafe_allow_html=True)
 
-def show_hero_ranking(df):
+def show_hero_ranking(ranking):
     st.markdown("### 🏆 **Ranking dos Heróis**")
-    if df.empty:
+    if ranking.empty:
         st.info("Ainda não há dados para formar um ranking.")
         return
     with st.container(height=500, border=False):
-        ranking = df.groupby(['hero_name', 'hero_team'])['crystals_reward'].sum().sort_values(ascending=False).reset_index()
         ranking.index += 1
-        medals = {1: "🥇", 2: "🥈", 3: "🥉"}
-        ranking['Posição'] = [medals.get(i, f"{i}º") for i in ranking.index]
+        positions = (ranking.index.astype(str) + "º").to_numpy()
+        medals = ["🥇", "🥈", "🥉"][:len(positions)]
+        positions[:len(medals)] = medals
+        ranking['Posição'] = positions
         st.dataframe(ranking[['Posição', 'hero_name', 'hero_team', 'crystals_reward']],
             column_config={
                 "hero_name": "Herói", "hero_team": "Time",
                 "crystals_reward": st.column_config.ProgressColumn("Total de Cristais 💎", format="%d", min_value=0, max_value=int(ranking['crystals_reward'].max()) if not ranking.empty else 1),
             }, use_container_width=True, hide_index=True)
 
-def show_pillar_distribution_chart(df):
+def show_pillar_distribution_chart(pillar_data):
     st.markdown("### 🏛️ **Segmentação por Pilar**")
-    pillar_data = df.groupby('pillar_name')['crystals_reward'].sum().reset_index()
+    if pillar_data.empty:
+        st.info("Não há cristais por pilar para exibir.")
+        return
     fig = px.pie(pillar_data, names='pillar_name', values='crystals_reward', title="Distribuição de Cristais por Pilar", hole=0.4, color_discrete_sequence=px.colors.qualitative.Pastel)
     fig.update_traces(textposition='inside', textinfo='percent', hovertemplate="<b>%{label}</b><br>%{value} Cristais<br>%{percent}<extra></extra>")
     fig.update_layout(height=500, showlegend=True, legend=dict(orientation="v", yanchor="middle", y=0.5, xanchor="left", x=1), margin=dict(l=20, r=80, t=50, b=20), title_font_size=16)
@@ -149,24 +237,25 @@ def show_sankey_diagram(df, top_n=10):
         st.info("🔍 Não há dados para gerar o fluxo de reconhecimento.")
         return
     
-    # Preparar dados agregados
-    nominator_pillar = df.groupby(['nominator_name', 'pillar_name'])['crystals_reward'].sum().reset_index()
-    pillar_nominee = df.groupby(['pillar_name', 'hero_name'])['crystals_reward'].sum().reset_index()
+    # Preparar dados agregados: um único groupby, e as demais visões somam níveis do MultiIndex
+    flows = df.groupby(['nominator_name', 'pillar_name', 'hero_name'], observed=True)['crystals_reward'].sum()
+    nominator_pillar = flows.groupby(level=['nominator_name', 'pillar_name'], observed=True).sum().reset_index()
+    pillar_nominee = flows.groupby(level=['pillar_name', 'hero_name'], observed=True).sum().reset_index()
     
     # Obter top nominadores e nomeados por cristais totais
-    nominator_totals = df.groupby('nominator_name')['crystals_reward'].sum().nlargest(top_n).reset_index()
-    nominee_totals = df.groupby('hero_name')['crystals_reward'].sum().nlargest(top_n).reset_index()
+    nominator_totals = flows.groupby(level='nominator_name', observed=True).sum().nlargest(top_n).reset_index()
+    nominee_totals = flows.groupby(level='hero_name', observed=True).sum().nlargest(top_n).reset_index()
     
     nominators = nominator_totals['nominator_name'].tolist()
     nominees = nominee_totals['hero_name'].tolist()
     
-    # Filtrar dados para top
-    nominator_pillar_filtered = nominator_pillar[nominator_pillar['nominator_name'].isin(nominators)].copy()
-    pillar_nominee_filtered = pillar_nominee[pillar_nominee['hero_name'].isin(nominees)].copy()
+    # Filtrar dados para top (sem .copy(): os recortes só são lidos daqui em diante)
+    nominator_pillar_filtered = nominator_pillar[nominator_pillar['nominator_name'].isin(nominators)]
+    pillar_nominee_filtered = pillar_nominee[pillar_nominee['hero_name'].isin(nominees)]
     
     # Ordenar pilares por total de cristais (descendente)
     if not nominator_pillar_filtered.empty:
-        pillar_sums = nominator_pillar_filtered.groupby('pillar_name')['crystals_reward'].sum().sort_values(ascending=False)
+        pillar_sums = nominator_pillar_filtered.groupby('pillar_name', observed=True)['crystals_reward'].sum().sort_values(ascending=False)
         pillars = pillar_sums.index.tolist()
     else:
         pillars = []
@@ -182,34 +271,30 @@ def show_sankey_diagram(df, top_n=10):
     
     original_nominee_map = {unique_nominees[i]: nominees[i] for i in range(len(nominees))}
     
-    sources, targets, values, link_colors = [], [], [], []
-    
     # Links: Nomeador → Pilar
-    for _, row in nominator_pillar_filtered.iterrows():
-        if row['nominator_name'] in node_map and row['pillar_name'] in node_map:
-            sources.append(node_map[row['nominator_name']])
-            targets.append(node_map[row['pillar_name']])
-            values.append(row['crystals_reward'])
-            link_colors.append('rgba(108, 92, 231, 0.6)')
+    nominator_links = pd.DataFrame({
+        'source': nominator_pillar_filtered['nominator_name'].astype(object).map(node_map),
+        'target': nominator_pillar_filtered['pillar_name'].astype(object).map(node_map),
+        'value': nominator_pillar_filtered['crystals_reward'],
+    }).dropna()
+    
+    # Links: Pilar → Nomeado (mapa reverso: nome original → rótulo único do nó)
+    reverse_nominee_map = {oname: uname for uname, oname in original_nominee_map.items()}
+    nominee_links = pd.DataFrame({
+        'source': pillar_nominee_filtered['pillar_name'].astype(object).map(node_map),
+        'target': pillar_nominee_filtered['hero_name'].astype(object).map(reverse_nominee_map).map(node_map),
+        'value': pillar_nominee_filtered['crystals_reward'],
+    }).dropna()
     
-    # Links: Pilar → Nomeado
-    for _, row in pillar_nominee_filtered.iterrows():
-        if row['pillar_name'] in node_map:
-            original_nominee = row['hero_name']
-            unique_nominee = next((uname for uname, oname in original_nominee_map.items() if oname == original_nominee), None)
-            
-            if unique_nominee and unique_nominee in node_map:
-                sources.append(node_map[row['pillar_name']])
-                targets.append(node_map[unique_nominee])
-                values.append(row['crystals_reward'])
-                link_colors.append('rgba(0, 184, 148, 0.6)')
+    sources = nominator_links['source'].astype(int).tolist() + nominee_links['source'].astype(int).tolist()
+    targets = nominator_links['target'].astype(int).tolist() + nominee_links['target'].astype(int).tolist()
+    values = nominator_links['value'].tolist() + nominee_links['value'].tolist()
+    link_colors = ['rgba(108, 92, 231, 0.6)'] * len(nominator_links) + ['rgba(0, 184, 148, 0.6)'] * len(nominee_links)
     
     if not sources:
         st.info("Nenhum fluxo de dados disponível para o diagrama.")
         return
     
-    node_x, node_y, node_colors, display_labels = [], [], [], []
-    
     nominator_count, pillar_count, nominee_count = len(nominators), len(pillars), len(nominees)
     max_nodes = max(nominator_count, pillar_count, nominee_count)
     
@@ -219,25 +304,18 @@ def show_sankey_diagram(df, top_n=10):
     # Posições X fixas
     left_x, mid_x, right_x = 0.1, 0.5, 0.9
     
-    for i, node in enumerate(all_nodes):
-        if node in nominators:
-            node_x.append(left_x)
-            node_colors.append('rgba(108, 92, 231, 0.8)')
-            nominator_idx = list(nominators).index(node)
-            node_y.append(nominator_idx / max(nominator_count - 1, 1))
-            display_labels.append(f"<b>{node}</b>")
-        elif node in pillars:
-            node_x.append(mid_x)
-            node_colors.append('rgba(253, 203, 110, 0.8)')
-            pillar_idx = list(pillars).index(node)
-            node_y.append(pillar_idx / max(pillar_count - 1, 1))
-            display_labels.append(f"<b>{node}</b>")
-        else:
-            node_x.append(right_x)
-            node_colors.append('rgba(0, 184, 148, 0.8)')
-            nominee_idx = list(unique_nominees).index(node)
-            node_y.append(nominee_idx / max(nominee_count - 1, 1))
-            display_labels.append(f"<b>{original_nominee_map.get(node, node)}</b>")
+    # all_nodes já está ordenado em blocos (nomeadores, pilares, nomeados): as posições
+    # saem direto de np.arange por bloco, sem procurar cada nó com .index()
+    node_x = np.repeat([left_x, mid_x, right_x], [nominator_count, pillar_count, nominee_count]).tolist()
+    node_y = np.concatenate([
+        np.arange(nominator_count) / max(nominator_count - 1, 1),
+        np.arange(pillar_count) / max(pillar_count - 1, 1),
+        np.arange(nominee_count) / max(nominee_count - 1, 1),
+    ]).tolist()
+    node_colors = (['rgba(108, 92, 231, 0.8)'] * nominator_count
+                   + ['rgba(253, 203, 110, 0.8)'] * pillar_count
+                   + ['rgba(0, 184, 148, 0.8)'] * nominee_count)
+    display_labels = [f"<b>{node}</b>" for node in list(nominators) + list(pillars)] + [f"<b>{node}</b>" for node in nominees]
     
     fig = go.Figure(data=[go.Sankey(
         node=dict(
@@ -287,14 +365,60 @@ def show_sankey_diagram(df, top_n=10):
     st.plotly_chart(fig, use_container_width=True, config=config)
 
 
-def show_history_chart(df):
+HISTORY_MAX_POINTS = 500
+
+def lttb_indices(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets: escolhe `threshold` pontos que preservam o
+    formato visual da série (picos e vales). Retorna os índices selecionados.
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    # Primeiro e último ponto são sempre mantidos; o miolo é dividido em baldes.
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Média do balde seguinte (ou o último ponto, no balde final).
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x, avg_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        # Área do triângulo (ponto anterior, candidato, média seguinte) para todo o balde de uma vez.
+        areas = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(areas.argmax())
+        selected[i + 1] = a
+    return selected
+
+
+def show_history_chart(daily_crystals):
     """Exibe um gráfico de linha com o histórico de conquistas."""
     st.markdown("### 📈 **Histórico de Conquistas**")
-    df['date_only'] = df['nomination_date'].dt.date
-    daily_crystals = df.groupby('date_only')['crystals_reward'].sum().reset_index().sort_values('date_only')
-    daily_crystals['formatted_date'] = pd.to_datetime(daily_crystals['date_only']).dt.strftime('%d/%m/%Y')
-    fig = px.area(daily_crystals, x='formatted_date', y='crystals_reward', title="Cristais Distribuídos ao Longo do Tempo", labels={'formatted_date': 'Data', 'crystals_reward': 'Total de Cristais'}, markers=True)
-    fig.update_layout(height=400, xaxis={'type': 'category'})
+    if daily_crystals.empty:
+        st.info("Não há histórico de cristais para exibir.")
+        return
+    # Com meses de dados, reduz a série a ~500 pontos (LTTB) antes de enviar ao Plotly.
+    if len(daily_crystals) > HISTORY_MAX_POINTS:
+        days = daily_crystals['date_only'].values.astype('datetime64[D]').astype(np.int64)
+        keep = lttb_indices(days, daily_crystals['crystals_reward'].to_numpy(dtype=float), HISTORY_MAX_POINTS)
+        daily_crystals = daily_crystals.iloc[keep]
+    # Traço WebGL (Scattergl): históricos longos não viram milhares de nós SVG no navegador.
+    fig = go.Figure(go.Scattergl(
+        x=daily_crystals['date_only'], y=daily_crystals['crystals_reward'],
+        fill='tozeroy', mode='lines+markers',
+        hovertemplate="Data=%{x|%d/%m/%Y}<br>Total de Cristais=%{y}<extra></extra>"
+    ))
+    fig.update_layout(
+        height=400, title="Cristais Distribuídos ao Longo do Tempo",
+        # Eixo de datas real: o Plotly formata os rótulos, sem strftime linha a linha no pandas.
+        xaxis={'type': 'date', 'tickformat': '%d/%m/%Y', 'title': 'Data'}, yaxis={'title': 'Total de Cristais'},
+        uirevision='history'  # Mantém zoom/pan entre reruns
+    )
     st.plotly_chart(fig, use_container_width=True)
 
 
@@ -303,39 +427,51 @@ def show_page():
     st.header("⚔️ Salão dos Heróis")
     st.subheader("Acompanhe as lendas do reino, suas conquistas e os pilares mais valorizados.")
     
-    df_original = load_dashboard_data()
+    try:
+        options = fetch_filter_options()
+    except Exception as e:
+        st.error(f"Erro ao carregar dados do dashboard: {e}")
+        return
 
-    if df_original.empty:
+    if not options:
         st.warning("Ainda não há nomeações registradas para exibir no dashboard.", icon="⚠️")
         return
 
     with st.expander("🔍 **Filtrar Análise**", expanded=False):
-        min_date, max_date = df_original['nomination_date'].min().date(), df_original['nomination_date'].max().date()
+        min_date, max_date = options['min_date'], options['max_date']
         col1, col2, col3 = st.columns(3)
         with col1: date_range = st.date_input("📅 Período", (min_date, max_date), min_value=min_date, max_value=max_date)
-        with col2: selected_heroes = st.multiselect("🛡️ Heróis", sorted(df_original['hero_name'].unique()), default=sorted(df_original['hero_name'].unique()))
-        with col3: selected_pillars = st.multiselect("🏛️ Pilares", sorted(df_original['pillar_name'].unique()), default=sorted(df_original['pillar_name'].unique()))
-    
-    df_filtered = df_original.copy()
-    if len(date_range) == 2: df_filtered = df_filtered[(df_filtered['nomination_date'].dt.date >= date_range[0]) & (df_filtered['nomination_date'].dt.date <= date_range[1])]
-    if selected_heroes: df_filtered = df_filtered[df_filtered['hero_name'].isin(selected_heroes)]
-    if selected_pillars: df_filtered = df_filtered[df_filtered['pillar_name'].isin(selected_pillars)]
-        
-    if df_filtered.empty:
-        st.info("Nenhum dado encontrado para os filtros selecionados.")
+        with col2: selected_heroes = st.multiselect("🛡️ Heróis", options['heroes'], default=options['heroes'])
+        with col3: selected_pillars = st.multiselect("🏛️ Pilares", options['pillars'], default=options['pillars'])
+
+    # Os filtros viram parâmetros SQL; a tupla também serve de chave para os caches.
+    start, end = date_range if len(date_range) == 2 else (None, None)
+    filters = (start, end, tuple(selected_heroes), tuple(selected_pillars))
+
+    # Todas as consultas antes de desenhar: uma falha no banco vira uma única mensagem de erro.
+    try:
+        kpis = fetch_kpis(*filters)
+        if kpis['total_nominations'] == 0:
+            st.info("Nenhum dado encontrado para os filtros selecionados.")
+            return
+        feed, ranking = fetch_feed(*filters), fetch_ranking(*filters)
+        pillar_totals, sankey_edges = fetch_pillar_totals(*filters), fetch_sankey_edges(*filters)
+        daily_crystals = fetch_daily_crystals(*filters)
+    except Exception as e:
+        st.error(f"Erro ao carregar dados do dashboard: {e}")
         return
-        
-    show_kpi_cards(df_filtered)
+
+    show_kpi_cards(kpis)
     st.divider()
     col_feed, col_rank = st.columns([1.5, 2], gap="large")
-    with col_feed: show_recognition_feed(df_filtered)
-    with col_rank: show_hero_ranking(df_filtered)
+    with col_feed: show_recognition_feed(feed)
+    with col_rank: show_hero_ranking(ranking)
     st.divider()
     col_pie, col_sankey = st.columns(2, gap="large")
-    with col_pie: show_pillar_distribution_chart(df_filtered)
-    with col_sankey: show_sankey_diagram(df_filtered, top_n=10)
+    with col_pie: show_pillar_distribution_chart(pillar_totals)
+    with col_sankey: show_sankey_diagram(sankey_edges, top_n=10)
     st.divider()
-    show_history_chart(df_filtered)
+    show_history_chart(daily_crystals)
 
 # --- Ponto de Entrada da Aplicação ---
 if __name__ == "__main__":
@@ -1,41 +1,23 @@
 import streamlit as st
 import pandas as pd
-import psycopg2
-import os
-import base64  # Importa a biblioteca para decodificação
-from dotenv import load_dotenv
+from db import get_db_connection, fetch_dataframe
 
 # --- Configuração Básica ---
 st.set_page_config(layout="wide")
-load_dotenv()
 
-# --- Funções de Conexão com o Banco de Dados ---
-
-def get_db_connection():
-    """Cria e retorna uma NOVA conexão com o banco de dados."""
-    try:
-        conn = psycopg2.connect(
-            host=os.getenv("SUPABASE_HOST"),
-            database=os.getenv("SUPABASE_DATABASE"),
-            user=os.getenv("SUPABASE_USER"),
-            password=os.getenv("SUPABASE_KEY"),
-            port=os.getenv("SUPABASE_PORT")
-        )
-        return conn
-    except psycopg2.OperationalError as e:
-        st.error(f"Erro de conexão com o banco de dados: {e}")
-        return None
+# --- Funções de Banco de Dados (conexões emprestadas do pool em db.py) ---
 
+# Pilares e missões mudam só pela página de administração: 1 minuto de cache evita
+# uma ida ao banco a cada rerun sem deixar a vitrine desatualizada por muito tempo.
+@st.cache_data(ttl=60, show_spinner=False)
 def load_missions_and_pillars():
     """Carrega todos os pilares e suas missões associadas usando um JOIN."""
-    conn = None
     try:
-        conn = get_db_connection()
-        if conn:
+        with get_db_connection() as conn:
             query = """
             SELECT 
                 p.pillar_name,
-                p.pillar_image, -- A coluna que contém a string Base64
+                p.pillar_image, -- Ícone do pilar (bytea)
                 m.mission_name,
                 m.mission_describe,
                 m.crystals_reward
@@ -46,33 +28,26 @@ def load_missions_and_pillars():
             ORDER BY 
                 p.pillar_name, m.crystals_reward DESC;
             """
-            return pd.read_sql_query(query, conn)
-        return pd.DataFrame()
+            return fetch_dataframe(conn, query)
     except Exception as e:
         st.error(f"Erro ao carregar dados dos pilares e missões: {e}")
         return pd.DataFrame()
-    finally:
-        if conn:
-            conn.close()
 
 # --- Componentes de UI e Funções de Exibição ---
 
-def render_base64_image(base64_string, width=100):
+def render_pillar_image(image_bytes, width=100):
     """
-    Decodifica uma string Base64 e a exibe como uma imagem no Streamlit.
+    Exibe o ícone do pilar; a coluna é bytea, então os bytes vão direto para o st.image.
     """
-    if isinstance(base64_string, str) and base64_string:
+    if isinstance(image_bytes, bytes) and image_bytes:
         try:
-            # Decodifica a string Base64 para bytes
-            img_bytes = base64.b64decode(base64_string)
-            # Exibe a imagem a partir dos bytes
-            st.image(img_bytes, width=width)
+            st.image(image_bytes, width=width)
         except Exception as e:
-            # Se a string não for uma Base64 válida, mostra um erro e um fallback
-            st.error(f"Erro ao decodificar imagem: {e}")
+            # Se os bytes não forem uma imagem válida, mostra um erro e um fallback
+            st.error(f"Erro ao exibir imagem: {e}")
             st.markdown('<div style="font-size: 3rem; text-align: center;">🖼️</div>', unsafe_allow_html=True)
     else:
-        # Se a coluna estiver vazia ou não for uma string, mostra um ícone padrão
+        # Se a coluna estiver vazia (pilar sem ícone), mostra um ícone padrão
         st.markdown('<div style="font-size: 3rem; text-align: center;">🏛️</div>', unsafe_allow_html=True)
 
 
@@ -106,22 +81,19 @@ def show_page():
         
     st.divider()
 
-    pilares = df_data['pillar_name'].unique()
-    
-    for pilar in pilares:
+    # Um único groupby (na ordem da consulta) em vez de um filtro booleano por pilar
+    for pilar, group in df_data.groupby('pillar_name', sort=False):
         # Layout com colunas para alinhar a imagem e o título do pilar
         col_img, col_title = st.columns([1, 5])
 
         with col_img:
-            # Pega a string Base64 da primeira linha correspondente ao pilar
-            base64_image_string = df_data[df_data['pillar_name'] == pilar]['pillar_image'].iloc[0]
-            # Usa a nova função para renderizar a imagem
-            render_base64_image(base64_image_string, width=80)
+            # Pega o ícone da primeira linha do grupo do pilar
+            render_pillar_image(group['pillar_image'].iat[0], width=80)
 
         with col_title:
             st.markdown(f"## {pilar}")
 
-        df_pilar_missions = df_data[df_data['pillar_name'] == pilar].dropna(subset=['mission_name'])
+        df_pilar_missions = group.dropna(subset=['mission_name'])
 
         if df_pilar_missions.empty:
             st.markdown(
@@ -129,11 +101,11 @@ def show_page():
                 unsafe_allow_html=True
             )
         else:
-            for _, row in df_pilar_missions.iterrows():
+            for row in df_pilar_missions.itertuples(index=False):
                 show_mission_card(
-                    row['mission_name'],
-                    row['mission_describe'],
-                    row['crystals_reward']
+                    row.mission_name,
+                    row.mission_describe,
+                    row.crystals_reward
                 )
         
         st.divider()
@@ -1,94 +1,86 @@
 import streamlit as st
 import pandas as pd
+import io
 import psycopg2
-import os
-import base64
-from dotenv import load_dotenv
+from PIL import Image, ImageOps
 import time
-import logging
+from db import get_db_connection, fetch_dataframe
 
 # --- Configuração Básica ---
 st.set_page_config(layout="wide")
-load_dotenv()
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
 
-# --- Funções de Conexão (Estratégia Abrir-Usar-Fechar) ---
-
-def get_db_connection():
-    """Cria e retorna uma NOVA conexão com o banco de dados."""
-    try:
-        conn = psycopg2.connect(
-            host=os.getenv("SUPABASE_HOST"),
-            database=os.getenv("SUPABASE_DATABASE"),
-            user=os.getenv("SUPABASE_USER"),
-            password=os.getenv("SUPABASE_KEY"),
-            port=os.getenv("SUPABASE_PORT")
-        )
-        return conn
-    except psycopg2.OperationalError as e:
-        st.error(f"Erro de conexão com o banco de dados: {e}")
-        return None
+# --- Funções de Banco de Dados (conexões emprestadas do pool em db.py) ---
 
+# Heróis e missões são dados de referência: o cache (chaveado pela própria SQL) evita
+# uma ida ao banco a cada tecla digitada na justificativa.
+@st.cache_data(ttl=60, show_spinner=False)
 def load_data_from_db(query):
-    """ABRE, USA e FECHA a conexão para carregar dados."""
-    conn = None
-    try:
-        conn = get_db_connection()
-        if conn:
-            return pd.read_sql_query(query, conn)
-        return pd.DataFrame()
-    except Exception as e:
-        # A mensagem de erro específica já vem do psycopg2
-        st.error(f"Erro ao carregar dados: {e}")
-        return pd.DataFrame()
-    finally:
-        if conn:
-            conn.close()
-            logger.info("Conexão de leitura (nomeação) fechada.")
-
-def insert_nomination(nominator_id, nominee_id, mission_id, justification, image_base64=None):
-    """ABRE, USA e FECHA a conexão para inserir uma nova nomeação."""
-    conn = None
+    """
+    Carrega dados com uma conexão emprestada do pool.
+    Erros sobem para quem chama: o st.cache_data não guarda exceções, então uma falha
+    do banco não fica presa no cache durante o TTL.
+    """
+    with get_db_connection() as conn:
+        return fetch_dataframe(conn, query)
+
+def insert_nomination(nominator_id, nominee_id, mission_id, justification, image_bytes=None):
+    """Insere uma nova nomeação; em caso de erro, o pool desfaz a transação ao receber a conexão de volta."""
+    sql = "INSERT INTO fact_nomination (nominator_id, nominee_id, mission_id, justification, image) VALUES (%s, %s, %s, %s, %s)"
     try:
-        conn = get_db_connection()
-        if not conn: return False
-        
-        sql = "INSERT INTO fact_nomination (nominator_id, nominee_id, mission_id, justification, image) VALUES (%s, %s, %s, %s, %s)"
-        with conn.cursor() as cur:
-            cur.execute(sql, (nominator_id, nominee_id, mission_id, justification, image_base64))
-        conn.commit()
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                # A evidência vai crua para a coluna bytea, sem passar por Base64
+                image = psycopg2.Binary(image_bytes) if image_bytes else None
+                cur.execute(sql, (nominator_id, nominee_id, mission_id, justification, image))
+            conn.commit()
         return True
     except Exception as e:
-        if conn: conn.rollback()
         st.error(f"Erro ao salvar a nomeação: {e}")
         return False
-    finally:
-        if conn:
-            conn.close()
-            logger.info("Conexão de escrita (nomeação) fechada.")
+
+HEROES_QUERY = "SELECT hero_id, hero_name FROM dim_hero ORDER BY hero_name;"
+MISSIONS_QUERY = """
+    SELECT m.mission_id, m.mission_name, m.mission_describe, m.crystals_reward, p.pillar_name
+    FROM dim_mission m JOIN dim_pillar p ON m.pillar_id = p.pillar_id;
+"""
+
+def load_reference_data():
+    """
+    Busca heróis e missões uma após a outra, reaproveitando a conexão já aberta do pool.
+    Em paralelo, a segunda consulta abriria (e o pool fecharia logo depois) uma conexão
+    nova com o Supabase, cujo handshake custa mais do que a ida ao banco economizada.
+    """
+    try:
+        return load_data_from_db(HEROES_QUERY), load_data_from_db(MISSIONS_QUERY)
+    except Exception as e:
+        # A mensagem de erro específica já vem do psycopg2
+        st.error(f"Erro ao carregar dados: {e}")
+        return pd.DataFrame(), pd.DataFrame()
 
 # --- Componentes de UI e Funções da Página (sem alterações na lógica interna) ---
 
+@st.cache_data(max_entries=32, show_spinner=False)
+def _sorted_unique(values):
+    """Opções ordenadas e sem repetição para um selectbox; reaproveitadas enquanto os dados não mudam."""
+    return tuple(sorted(set(values)))
+
 def create_custom_header(title, subtitle, icon):
     st.header(f"{icon} {title}")
     st.subheader(subtitle)
 
+# Montados uma vez, na carga da página, e não a cada ícone renderizado
+_ICON_MAP = {"Pilar A": "🏛️", "Pilar B": "💡", "Pilar C": "🎯", "Padrão": "⭐"}
+_PILLAR_HTML = {pillar: f'<span style="font-size: {{size}};">{icon}</span>' for pillar, icon in _ICON_MAP.items()}
+_DEFAULT_HTML = _PILLAR_HTML["Padrão"]
+
 def display_pillar_icon(pillar_name, size="30px"):
-    icon_map = {"Pilar A": "🏛️", "Pilar B": "💡", "Pilar C": "🎯", "Padrão": "⭐"}
-    icon = icon_map.get(pillar_name, icon_map["Padrão"])
-    return f'<span style="font-size: {size};">{icon}</span>'
+    return _PILLAR_HTML.get(pillar_name, _DEFAULT_HTML).format(size=size)
 
 def show_nomination_page():
     """Exibe a página para criar uma nova nomeação."""
     create_custom_header("Pergaminho de Nomeações", "Reconheça um ato de bravura ou sabedoria de um colega herói", "📜")
     
-    # Cada uma dessas chamadas agora abre e fecha sua própria conexão
-    df_herois = load_data_from_db("SELECT hero_id, hero_name FROM dim_hero ORDER BY hero_name;")
-    df_missoes = load_data_from_db("""
-        SELECT m.mission_id, m.mission_name, m.mission_describe, m.crystals_reward, p.pillar_name
-        FROM dim_mission m JOIN dim_pillar p ON m.pillar_id = p.pillar_id;
-    """)
+    df_herois, df_missoes = load_reference_data()
     
     # A verificação de erro agora funciona de forma mais confiável
     if df_herois.empty or df_missoes.empty:
@@ -96,10 +88,14 @@ def show_nomination_page():
         # Adicionado um st.stop() para não renderizar o resto da página se os dados essenciais falharem
         st.stop()
     
+    # Mapas nome → id montados uma vez; o envio faz buscas O(1) em vez de filtrar os DataFrames
+    hero_id_map = dict(zip(df_herois['hero_name'], df_herois['hero_id'].astype(int).tolist()))
+    mission_id_map = dict(zip(zip(df_missoes['pillar_name'], df_missoes['mission_name']), df_missoes['mission_id'].astype(int).tolist()))
+    
     nomeador, nomeado = select_heroes(df_herois)
     pilar, missao = select_mission(df_missoes)
     justificativa, anexo = get_justification()
-    handle_submission(nomeador, nomeado, pilar, missao, justificativa, anexo, df_herois, df_missoes)
+    handle_submission(nomeador, nomeado, pilar, missao, justificativa, anexo, hero_id_map, mission_id_map)
 
 def select_heroes(df_herois):
     st.markdown("### 👥 Passo 1: Selecione os Heróis")
@@ -113,7 +109,7 @@ def select_heroes(df_herois):
 
 def select_mission(df_missoes):
     st.markdown("### 🎯 Passo 2: Especifique o Feito")
-    pilar = st.selectbox("🏛️ Pilar", options=df_missoes['pillar_name'].dropna().unique(), index=None, placeholder="Selecione o pilar do feito")
+    pilar = st.selectbox("🏛️ Pilar", options=_sorted_unique(tuple(df_missoes['pillar_name'].dropna())), index=None, placeholder="Selecione o pilar do feito")
     missao = None
     if pilar:
         missoes_do_pilar = df_missoes[df_missoes['pillar_name'] == pilar]
@@ -137,28 +133,47 @@ def get_justification():
     anexo = st.file_uploader("📎 Anexar Evidência (Opcional)", help="Anexe um print, certificado ou imagem.", type=['png', 'jpg', 'jpeg'])
     return justificativa, anexo
 
-def handle_submission(nomeador, nomeado, pilar, missao, justificativa, anexo, df_herois, df_missoes):
+def handle_submission(nomeador, nomeado, pilar, missao, justificativa, anexo, hero_id_map, mission_id_map):
     is_self_nomination = nomeador and nomeado and nomeador == nomeado
     if is_self_nomination:
         st.warning("⚠️ Um herói não pode nomear a si mesmo!")
     
     st.divider()
     
-    is_valid = all([nomeador, nomeado, pilar, missao, justificativa.strip()]) and not is_self_nomination
+    # Curto-circuito: as checagens baratas vêm antes; o .strip() só roda com tudo selecionado
+    is_valid = bool(nomeador and nomeado and pilar and missao and not is_self_nomination and justificativa and justificativa.strip())
     
     if st.button("🚀 Enviar Nomeação", use_container_width=True, type="primary", disabled=not is_valid):
-        submit_nomination(nomeador, nomeado, missao, justificativa, anexo, df_herois, df_missoes)
-
-def submit_nomination(nomeador_nome, nomeado_nome, missao_nome, justificativa, anexo, df_herois, df_missoes):
-    base64_image = None
+        submit_nomination(nomeador, nomeado, pilar, missao, justificativa, anexo, hero_id_map, mission_id_map)
+
+# Evidências são reduzidas antes de salvar: fotos de celular com vários MB viram
+# JPEGs de algumas centenas de KB, menores no banco, na rede e na decodificação.
+EVIDENCE_MAX_SIZE = (1024, 1024)
+EVIDENCE_JPEG_QUALITY = 78
+
+def compress_evidence(anexo):
+    """Redimensiona a imagem anexada e a recodifica como JPEG, retornando os bytes."""
+    img = ImageOps.exif_transpose(Image.open(anexo))
+    img.thumbnail(EVIDENCE_MAX_SIZE)
+    buf = io.BytesIO()
+    img.convert('RGB').save(buf, 'JPEG', quality=EVIDENCE_JPEG_QUALITY, optimize=True)
+    return buf.getvalue()
+
+def submit_nomination(nomeador_nome, nomeado_nome, pilar_nome, missao_nome, justificativa, anexo, hero_id_map, mission_id_map):
+    image_bytes = None
     if anexo:
-        base64_image = base64.b64encode(anexo.getvalue()).decode('utf-8')
+        try:
+            image_bytes = compress_evidence(anexo)
+        except Exception as e:
+            st.error(f"Não foi possível processar a imagem anexada: {e}")
+            return
     
-    id_nomeador = int(df_herois.loc[df_herois['hero_name'] == nomeador_nome, 'hero_id'].iloc[0])
-    id_nomeado = int(df_herois.loc[df_herois['hero_name'] == nomeado_nome, 'hero_id'].iloc[0])
-    id_missao = int(df_missoes.loc[df_missoes['mission_name'] == missao_nome, 'mission_id'].iloc[0])
+    id_nomeador = hero_id_map[nomeador_nome]
+    id_nomeado = hero_id_map[nomeado_nome]
+    # A missão é identificada junto com o pilar: nomes de missão podem se repetir entre pilares
+    id_missao = mission_id_map[(pilar_nome, missao_nome)]
     
-    success = insert_nomination(id_nomeador, id_nomeado, id_missao, justificativa, base64_image)
+    success = insert_nomination(id_nomeador, id_nomeado, id_missao, justificativa, image_bytes)
     
     if success:
         st.success(f"🎉 Nomeação de **'{nomeado_nome}'** registrada com sucesso!")
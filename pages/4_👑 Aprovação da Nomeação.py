@@ -1,18 +1,11 @@
 import streamlit as st
 import pandas as pd
-import psycopg2
-import os
-import base64
-from dotenv import load_dotenv
-import time
-import logging
+from db import get_db_connection, fetch_dataframe
+from auth import is_correct_password
 
 # =================================================================================
 # === 1. LÓGICA DE AUTENTICAÇÃO (CORRIGIDA) =======================================
 # =================================================================================
-# Carrega as variáveis de ambiente PRIMEIRO
-load_dotenv()
-
 def check_password():
     """Mostra o formulário de login e retorna True se a senha estiver correta."""
     if st.session_state.get("authenticated", False):
@@ -24,9 +17,7 @@ def check_password():
     password_input = st.text_input("Senha", type="password", key="password_input")
 
     if st.button("Entrar"):
-        correct_password = os.getenv("ADMIN_PASSWORD")
-        
-        if correct_password and password_input == correct_password:
+        if is_correct_password(password_input):
             st.session_state["authenticated"] = True
             # A LINHA QUE CAUSAVA O ERRO FOI REMOVIDA DAQUI
             st.rerun()
@@ -43,80 +34,114 @@ if not check_password():
 
 # --- Configuração Básica (só é executada após o login) ---
 st.set_page_config(layout="wide")
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
 
-# --- Funções de Banco de Dados (Sem alterações) ---
+# --- Funções de Banco de Dados (conexões emprestadas do pool em db.py) ---
 
-def get_db_connection():
-    """Cria e retorna uma NOVA conexão com o banco de dados."""
-    try:
-        conn = psycopg2.connect(
-            host=os.getenv("SUPABASE_HOST"),
-            database=os.getenv("SUPABASE_DATABASE"),
-            user=os.getenv("SUPABASE_USER"),
-            password=os.getenv("SUPABASE_KEY"),
-            port=os.getenv("SUPABASE_PORT")
-        )
-        return conn
-    except psycopg2.OperationalError as e:
-        st.error(f"Erro de conexão com o banco de dados: {e}")
-        return None
-
-def load_enriched_nominations():
-    """Carrega nomeações do banco, abrindo e fechando a conexão."""
-    conn = None
+# Filtros de status aplicados no próprio Postgres (nunca vêm do usuário)
+STATUS_FILTERS = {
+    'pending': "fn.approved_flag = FALSE AND fn.refuse_flag = FALSE",
+    'approved': "fn.approved_flag = TRUE",
+    'refused': "fn.refuse_flag = TRUE",
+}
+
+PROCESSED_LIMIT = 200
+
+# Cards pendentes por página: cada card gera ~10 elementos no front-end
+PENDING_PAGE_SIZE = 20
+
+# Os loaders em cache deixam os erros subirem: o st.cache_data não guarda exceções,
+# então uma falha do banco não fica presa no cache durante o TTL. Quem chama trata o erro.
+@st.cache_data(ttl=60, show_spinner=False)
+def load_enriched_nominations(status, limit=None):
+    """Carrega as nomeações de um status, já filtradas (e limitadas) pelo banco."""
+    with get_db_connection() as conn:
+        query = f"""
+        SELECT
+            fn.nomination_id, fn.justification, fn.image IS NOT NULL AS has_image, fn.created_at,
+            fn.approved_flag, fn.refuse_flag,
+            nominator.hero_name AS nominator_name,
+            nominee.hero_name AS nominee_name,
+            dm.mission_name, dp.pillar_name
+        FROM fact_nomination AS fn
+        JOIN dim_hero AS nominator ON fn.nominator_id = nominator.hero_id
+        JOIN dim_hero AS nominee ON fn.nominee_id = nominee.hero_id
+        JOIN dim_mission AS dm ON fn.mission_id = dm.mission_id
+        JOIN dim_pillar AS dp ON dm.pillar_id = dp.pillar_id
+        WHERE {STATUS_FILTERS[status]}
+        ORDER BY fn.created_at DESC
+        LIMIT %s;
+        """
+        # LIMIT NULL equivale a não limitar. Cursor nomeado (do lado do servidor):
+        # o join largo é entregue direto ao DataFrame, sem o buffer do cursor comum.
+        df = fetch_dataframe(conn, query, (limit,), name=f"load_nominations_{status}")
+    if not df.empty:
+        # Data formatada numa única passada vetorizada, junto com a carga do cache (e não por card)
+        df['created_at_str'] = df['created_at'].dt.strftime('%d/%m/%Y')
+    return df
+
+# Evidências não mudam depois de enviadas: reabrir um card não volta ao banco.
+@st.cache_data(ttl=600, max_entries=128, show_spinner=False)
+def load_nomination_image(nomination_id):
+    """Busca só a evidência (bytea) de uma nomeação; a listagem não carrega as imagens."""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT image FROM fact_nomination WHERE nomination_id = %s", (int(nomination_id),))
+            result = cur.fetchone()
+    return bytes(result[0]) if result and result[0] is not None else None
+
+def _load_nominations_or_empty(status, limit=None):
+    """Versão sem cache de load_enriched_nominations: mostra o erro e devolve um DataFrame vazio."""
     try:
-        conn = get_db_connection()
-        if conn:
-            query = """
-            SELECT
-                fn.nomination_id, fn.justification, fn.image, fn.created_at,
-                fn.approved_flag, fn.refuse_flag,
-                nominator.hero_name AS nominator_name,
-                nominee.hero_name AS nominee_name,
-                dm.mission_name, dp.pillar_name
-            FROM fact_nomination AS fn
-            JOIN dim_hero AS nominator ON fn.nominator_id = nominator.hero_id
-            JOIN dim_hero AS nominee ON fn.nominee_id = nominee.hero_id
-            JOIN dim_mission AS dm ON fn.mission_id = dm.mission_id
-            JOIN dim_pillar AS dp ON dm.pillar_id = dp.pillar_id
-            ORDER BY fn.created_at DESC;
-            """
-            return pd.read_sql_query(query, conn)
-        return pd.DataFrame()
+        return load_enriched_nominations(status, limit)
     except Exception as e:
         st.error(f"Erro ao carregar dados: {e}")
         return pd.DataFrame()
-    finally:
-        if conn:
-            conn.close()
 
-def update_nomination_status(nomination_id, status_to_update):
-    """Atualiza o status de uma nomeação, abrindo e fechando a conexão."""
-    conn = None
-    try:
-        conn = get_db_connection()
-        if not conn: return False
+def load_pending_nominations():
+    return _load_nominations_or_empty('pending')
+
+def load_processed_nominations(status, limit=PROCESSED_LIMIT):
+    return _load_nominations_or_empty(status, limit)
 
-        if status_to_update == 'approved':
-            sql = "UPDATE fact_nomination SET approved_flag = TRUE, refuse_flag = FALSE WHERE nomination_id = %s"
-        elif status_to_update == 'refused':
-            sql = "UPDATE fact_nomination SET refuse_flag = TRUE, approved_flag = FALSE WHERE nomination_id = %s"
+@st.cache_data(ttl=60, show_spinner=False)
+def load_status_counts():
+    """Conta as nomeações por status com um único GROUP BY (no máximo 3 linhas)."""
+    counts = {'pending': 0, 'approved': 0, 'refused': 0}
+    with get_db_connection() as conn:
+        df = fetch_dataframe(conn, """
+            SELECT approved_flag, refuse_flag, COUNT(*) AS total
+            FROM fact_nomination
+            GROUP BY 1, 2;
+        """)
+    for approved, refused, total in zip(df['approved_flag'], df['refuse_flag'], df['total']):
+        if approved:
+            counts['approved'] += int(total)
+        elif refused:
+            counts['refused'] += int(total)
         else:
-            return False
+            counts['pending'] += int(total)
+    return counts
 
-        with conn.cursor() as cur:
-            cur.execute(sql, (nomination_id,))
-        conn.commit()
+def update_nomination_status(nomination_id, status_to_update):
+    """Atualiza o status de uma nomeação; em caso de erro, o pool desfaz a transação."""
+    if status_to_update == 'approved':
+        sql = "UPDATE fact_nomination SET approved_flag = TRUE, refuse_flag = FALSE WHERE nomination_id = %s"
+    elif status_to_update == 'refused':
+        sql = "UPDATE fact_nomination SET refuse_flag = TRUE, approved_flag = FALSE WHERE nomination_id = %s"
+    else:
+        return False
+
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(sql, (int(nomination_id),))
+            conn.commit()
+        load_enriched_nominations.clear()
+        load_status_counts.clear()
         return True
     except Exception as e:
-        if conn: conn.rollback()
         st.error(f"Erro ao atualizar status da nomeação: {e}")
         return False
-    finally:
-        if conn:
-            conn.close()
 
 
 # --- Componentes de UI e Funções de Exibição (Sem alterações) ---
@@ -125,47 +150,61 @@ def create_custom_header(title, subtitle, icon):
     st.header(f"{icon} {title}")
     st.subheader(subtitle)
 
+# Montados uma vez, na carga da página, e não a cada card renderizado
+_ICON_MAP = {"Padrão": "⭐"} # Adicione seus pilares aqui
+_PILLAR_HTML = {pillar: f'<span style="font-size: {{size}};">{icon}</span>' for pillar, icon in _ICON_MAP.items()}
+_DEFAULT_HTML = _PILLAR_HTML["Padrão"]
+
 def display_pillar_icon(pillar_name, size="30px"):
-    icon_map = {"Padrão": "⭐"} # Adicione seus pilares aqui
-    icon = icon_map.get(pillar_name, icon_map["Padrão"])
-    return f'<span style="font-size: {size};">{icon}</span>'
+    return _PILLAR_HTML.get(pillar_name, _DEFAULT_HTML).format(size=size)
 
+# Fragmento: o clique em um card reexecuta só este card, não a página com todos os outros.
+@st.fragment
 def display_pending_card(row):
     with st.container(border=True):
         col_info, col_actions = st.columns([4, 1])
         with col_info:
-            pillar_icon = display_pillar_icon(row['pillar_name'])
+            pillar_icon = display_pillar_icon(row.pillar_name)
             st.markdown(f"""
                 <div style="display: flex; align-items: center; gap: 0.75rem;">
                     {pillar_icon}
                     <div>
-                        <strong>De:</strong> {row['nominator_name']} <strong>→ Para:</strong> {row['nominee_name']}<br>
-                        <small style="color: gray;">🎯 {row['mission_name']} | 📅 {pd.to_datetime(row['created_at']).strftime('%d/%m/%Y')}</small>
+                        <strong>De:</strong> {row.nominator_name} <strong>→ Para:</strong> {row.nominee_name}<br>
+                        <small style="color: gray;">🎯 {row.mission_name} | 📅 {row.created_at_str}</small>
                     </div>
                 </div>
             """, unsafe_allow_html=True)
         with col_actions:
-            if st.button("✅ Aprovar", key=f"approve_{row['nomination_id']}", use_container_width=True):
-                if update_nomination_status(row['nomination_id'], 'approved'):
-                    st.toast("Aprovado!", icon="✅"); time.sleep(1); st.rerun()
-            if st.button("❌ Recusar", key=f"refuse_{row['nomination_id']}", use_container_width=True):
-                if update_nomination_status(row['nomination_id'], 'refused'):
-                    st.toast("Recusado.", icon="❌"); time.sleep(1); st.rerun()
+            if st.button("✅ Aprovar", key=f"approve_{row.nomination_id}", use_container_width=True):
+                if update_nomination_status(row.nomination_id, 'approved'):
+                    st.toast("Aprovado!", icon="✅"); st.rerun(scope="app")
+            if st.button("❌ Recusar", key=f"refuse_{row.nomination_id}", use_container_width=True):
+                if update_nomination_status(row.nomination_id, 'refused'):
+                    st.toast("Recusado.", icon="❌"); st.rerun(scope="app")
         with st.expander("📋 Ver Justificativa e Evidência"):
-            st.info(f"**Justificativa:**\n\n{row['justification']}")
-            if row['image']:
-                try:
-                    img_bytes = base64.b64decode(row['image'])
-                    st.image(img_bytes, caption="Evidência Anexada", use_column_width=True)
-                except Exception as e:
-                    st.error(f"Não foi possível exibir a imagem. Erro: {e}")
+            st.info(f"**Justificativa:**\n\n{row.justification}")
+            if row.has_image:
+                # A imagem só é buscada no banco quando o avaliador pede para vê-la
+                if st.toggle("🖼️ Mostrar evidência anexada", key=f"show_image_{row.nomination_id}"):
+                    try:
+                        img_bytes = load_nomination_image(row.nomination_id)
+                    except Exception as e:
+                        st.error(f"Erro ao carregar a evidência: {e}")
+                        img_bytes = None
+                    if img_bytes:
+                        try:
+                            st.image(img_bytes, caption="Evidência Anexada", use_column_width=True)
+                        except Exception as e:
+                            st.error(f"Não foi possível exibir a imagem. Erro: {e}")
             else:
                 st.write("Nenhuma evidência foi anexada.")
 
-def display_processed_table(df, status_name):
+def display_processed_table(df, status_name, total):
     if df.empty:
         st.info(f"Nenhuma nomeação com status '{status_name}'.")
     else:
+        if total > len(df):
+            st.caption(f"Exibindo as {len(df)} mais recentes de {total}.")
         display_df = df[['created_at', 'nominator_name', 'nominee_name', 'mission_name', 'pillar_name']].rename(columns={
             'created_at': 'Data', 'nominator_name': 'Nomeador', 'nominee_name': 'Nomeado',
             'mission_name': 'Missão', 'pillar_name': 'Pilar'
@@ -184,38 +223,48 @@ def show_approval_page():
         st.session_state["authenticated"] = False
         st.rerun()
     
-    df_nominations = load_enriched_nominations()
-    if df_nominations.empty:
+    # Métricas vêm de um COUNT agrupado; só as linhas exibidas são trazidas do banco
+    try:
+        counts = load_status_counts()
+    except Exception as e:
+        st.error(f"Erro ao contar nomeações: {e}")
+        return
+    total = sum(counts.values())
+    if total == 0:
         st.success("✨ Nenhuma nomeação registrada no sistema ainda.")
         return
-
-    df_pending = df_nominations[(df_nominations['approved_flag'] == False) & (df_nominations['refuse_flag'] == False)]
-    df_approved = df_nominations[df_nominations['approved_flag'] == True]
-    df_refused = df_nominations[df_nominations['refuse_flag'] == True]
     
     col1, col2, col3, col4 = st.columns(4)
-    col1.metric("📝 Total de Nomeações", len(df_nominations))
-    col2.metric("⏳ Pendentes de Análise", len(df_pending))
-    col3.metric("✅ Aprovadas", len(df_approved))
-    col4.metric("❌ Recusadas", len(df_refused))
+    col1.metric("📝 Total de Nomeações", total)
+    col2.metric("⏳ Pendentes de Análise", counts['pending'])
+    col3.metric("✅ Aprovadas", counts['approved'])
+    col4.metric("❌ Recusadas", counts['refused'])
     
     st.divider()
     tab_pend, tab_aprov, tab_reprov = st.tabs([
-        f"⏳ Pendentes ({len(df_pending)})",
-        f"✅ Aprovadas ({len(df_approved)})",
-        f"❌ Recusadas ({len(df_refused)})"
+        f"⏳ Pendentes ({counts['pending']})",
+        f"✅ Aprovadas ({counts['approved']})",
+        f"❌ Recusadas ({counts['refused']})"
     ])
 
     with tab_pend:
+        df_pending = load_pending_nominations()
         if df_pending.empty:
             st.success("✨ Nenhuma nomeação pendente para avaliação no momento.")
         else:
-            for _, row in df_pending.iterrows():
+            # Paginação: o número de elementos enviados e comparados a cada rerun fica
+            # limitado ao tamanho da página, não ao total de pendências.
+            n_pages = -(-len(df_pending) // PENDING_PAGE_SIZE)
+            page = 1
+            if n_pages > 1:
+                page = st.number_input(f"Página (de {n_pages})", min_value=1, max_value=n_pages, value=1, step=1)
+            start = (page - 1) * PENDING_PAGE_SIZE
+            for row in df_pending.iloc[start:start + PENDING_PAGE_SIZE].itertuples(index=False):
                 display_pending_card(row)
     with tab_aprov:
-        display_processed_table(df_approved, "Aprovadas")
+        display_processed_table(load_processed_nominations('approved'), "Aprovadas", counts['approved'])
     with tab_reprov:
-        display_processed_table(df_refused, "Recusadas")
+        display_processed_table(load_processed_nominations('refused'), "Recusadas", counts['refused'])
 
 # --- Ponto de Entrada da Aplicação ---
 if __name__ == "__main__":
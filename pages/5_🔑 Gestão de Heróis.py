@@ -1,16 +1,14 @@
 import streamlit as st
 import pandas as pd
-import psycopg2
-import os
-from dotenv import load_dotenv
-import time
 import numpy as np 
+from psycopg2.extras import execute_values
+from db import get_db_connection, fetch_dataframe
+from auth import is_correct_password
+from csv_import import read_import_csv
 
 # =================================================================================
 # === 1. LÓGICA DE AUTENTICAÇÃO E CONFIGURAÇÃO INICIAL ============================
 # =================================================================================
-load_dotenv()
-
 def check_password():
     """Mostra o formulário de login e retorna True se a senha estiver correta."""
     if st.session_state.get("authenticated", False):
@@ -19,8 +17,7 @@ def check_password():
     st.warning("Por favor, insira a senha de administrador para acessar esta página.")
     password_input = st.text_input("Senha", type="password", key="password_input_heroes")
     if st.button("Entrar"):
-        correct_password = os.getenv("ADMIN_PASSWORD")
-        if correct_password and password_input == correct_password:
+        if is_correct_password(password_input):
             st.session_state["authenticated"] = True
             st.rerun()
         else:
@@ -47,65 +44,81 @@ st.sidebar.button("🚪 Sair da Área Restrita", on_click=logout, use_container_
 # =================================================================================
 # === 2. FUNÇÕES DE BANCO DE DADOS (CRUD) =========================================
 # =================================================================================
-
-def get_db_connection():
-    """Cria e retorna uma NOVA conexão com o banco de dados."""
-    try:
-        conn = psycopg2.connect(
-            host=os.getenv("SUPABASE_HOST"),
-            database=os.getenv("SUPABASE_DATABASE"),
-            user=os.getenv("SUPABASE_USER"),
-            password=os.getenv("SUPABASE_KEY"),
-            port=os.getenv("SUPABASE_PORT")
-        )
-        return conn
-    except psycopg2.OperationalError as e:
-        st.error(f"Erro de conexão com o banco de dados: {e}")
-        return None
-
-def execute_query(query, params=None, fetch=False):
-    """Função genérica para executar queries, com suporte a parâmetros para segurança."""
-    conn = None
+# Conexões emprestadas do pool compartilhado em db.py
+
+def execute_fetch(query, params=None):
+    """
+    Executa uma consulta parametrizada e retorna um DataFrame.
+    Erros sobem para o show_page: o st.cache_data não guarda exceções, então uma
+    falha do banco não deixa a lista vazia presa no cache até o TTL.
+    """
+    with get_db_connection() as conn:
+        return fetch_dataframe(conn, query, params)
+
+def execute_write(query, params=None):
+    """Executa um INSERT/UPDATE/DELETE parametrizado e confirma a transação."""
     try:
-        conn = get_db_connection()
-        if conn:
-            if fetch:
-                return pd.read_sql_query(query, conn, params=params)
-            else:
-                with conn.cursor() as cur:
-                    cur.execute(query, params)
-                conn.commit()
-                return True
-        return pd.DataFrame() if fetch else False
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(query, params)
+            conn.commit()
+            return True
     except Exception as e:
-        if conn and not fetch: conn.rollback()
+        # Escritas que falharam são desfeitas pelo pool ao receber a conexão de volta
         st.error(f"Erro no banco de dados: {e}")
-        return pd.DataFrame() if fetch else False
-    finally:
-        if conn:
-            conn.close()
+        return False
 
 # Funções CRUD específicas para Heróis
+# A lista só muda pelas funções abaixo, que limpam o cache após gravar com sucesso.
+@st.cache_data(ttl=300, show_spinner=False)
 def load_heroes():
-    return execute_query("SELECT hero_id, hero_name, hero_team, created_at FROM dim_hero ORDER BY hero_name", fetch=True)
+    df = execute_fetch("SELECT hero_id, hero_name, hero_team, created_at FROM dim_hero ORDER BY hero_name")
+    if not df.empty:
+        # Data formatada numa única passada vetorizada, e não uma vez por linha da lista
+        df['created_at_str'] = df['created_at'].dt.strftime('%d/%m/%Y')
+    return df
 
 def add_hero(name, team):
     query = "INSERT INTO dim_hero (hero_name, hero_team) VALUES (%s, %s)"
-    return execute_query(query, params=(name, team))
+    success = execute_write(query, params=(name, team))
+    if success: load_heroes.clear()
+    return success
 
 def update_hero(hero_id, name, team):
     query = "UPDATE dim_hero SET hero_name = %s, hero_team = %s WHERE hero_id = %s"
-    return execute_query(query, params=(name, team, int(hero_id)))
+    success = execute_write(query, params=(name, team, int(hero_id)))
+    if success: load_heroes.clear()
+    return success
 
 def delete_hero(hero_id):
     query = "DELETE FROM dim_hero WHERE hero_id = %s"
-    return execute_query(query, params=(int(hero_id),))
+    success = execute_write(query, params=(int(hero_id),))
+    if success: load_heroes.clear()
+    return success
+
+def bulk_add_heroes(rows):
+    """Insere vários heróis (tuplas nome, time) com INSERT ... VALUES em lote: uma ida ao banco a cada 500 linhas."""
+    try:
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                execute_values(cur, "INSERT INTO dim_hero (hero_name, hero_team) VALUES %s", rows, page_size=500)
+            conn.commit()
+    except Exception as e:
+        st.error(f"Erro no banco de dados: {e}")
+        return False
+    load_heroes.clear()
+    return True
 
 
 # =================================================================================
 # === 3. COMPONENTES DE UI E LÓGICA DA PÁGINA =====================================
 # =================================================================================
 
+@st.cache_data(max_entries=32, show_spinner=False)
+def _sorted_unique(values):
+    """Opções ordenadas e sem repetição para um selectbox; reaproveitadas enquanto os dados não mudam."""
+    return tuple(sorted(set(values)))
+
 def show_add_hero_form():
     """Formulário para adicionar um novo herói."""
     with st.expander("➕ **Cadastrar Novo Herói**", expanded=True):
@@ -117,11 +130,19 @@ def show_add_hero_form():
             if st.form_submit_button("✅ Adicionar Herói", use_container_width=True, type="primary"):
                 if hero_name.strip() and hero_team.strip():
                     if add_hero(hero_name.strip(), hero_team.strip()):
-                        st.success(f"Herói '{hero_name}' adicionado com sucesso!")
-                        time.sleep(1); st.rerun()
+                        st.toast(f"Herói '{hero_name}' adicionado com sucesso!", icon="✅")
+                        st.rerun()
                 else:
                     st.warning("Nome e Time são campos obrigatórios.")
 
+        st.markdown("##### 📥 Importar vários heróis (CSV)")
+        csv_file = st.file_uploader("Arquivo CSV com as colunas `hero_name` e `hero_team`", type=['csv'], key="heroes_csv")
+        if csv_file and st.button("📥 Importar Heróis", use_container_width=True):
+            df_csv = read_import_csv(csv_file, ['hero_name', 'hero_team'])
+            if df_csv is not None and bulk_add_heroes(list(df_csv.itertuples(index=False, name=None))):
+                st.toast(f"{len(df_csv)} heróis importados com sucesso!", icon="✅")
+                st.rerun()
+
 
 def show_edit_hero_form(hero_data):
     """Formulário para editar um herói existente."""
@@ -135,9 +156,9 @@ def show_edit_hero_form(hero_data):
         if s_col1.form_submit_button("💾 Salvar", use_container_width=True, type="primary"):
             if new_name.strip() and new_team.strip():
                 if update_hero(hero_data['hero_id'], new_name.strip(), new_team.strip()):
-                    st.success("Herói atualizado com sucesso!")
+                    st.toast("Herói atualizado com sucesso!", icon="✅")
                     del st.session_state.editing_hero_id
-                    time.sleep(1); st.rerun()
+                    st.rerun()
             else:
                 st.warning("Nome e Time não podem ser vazios.")
         
@@ -155,26 +176,34 @@ def show_heroes_list(df_heroes):
         st.info("Nenhum herói cadastrado ainda.")
         return
 
-    unique_teams = ['Todos'] + sorted(df_heroes['hero_team'].unique().tolist())
+    unique_teams = ('Todos',) + _sorted_unique(tuple(df_heroes['hero_team'].dropna()))
     selected_team = st.selectbox("Filtrar por Time", unique_teams)
 
     if selected_team != 'Todos':
         df_heroes = df_heroes[df_heroes['hero_team'] == selected_team]
 
-    for _, row in df_heroes.iterrows():
-        with st.container(border=True):
-            col1, col2, col3 = st.columns([3, 1, 1])
-            col1.markdown(f"**{row['hero_name']}** (`{row['hero_team']}`)")
-            col1.caption(f"ID: {row['hero_id']} | Cadastrado em: {row['created_at'].strftime('%d/%m/%Y')}")
+    for row in df_heroes.itertuples(index=False):
+        show_hero_row(row)
 
-            if col2.button("✏️ Editar", key=f"edit_{row['hero_id']}", use_container_width=True):
-                st.session_state.editing_hero_id = row['hero_id']
-                st.rerun()
-            
-            if col3.button("🗑️ Excluir", key=f"del_{row['hero_id']}", use_container_width=True, type="secondary"):
-                if delete_hero(row['hero_id']):
-                    st.success(f"Herói '{row['hero_name']}' excluído.")
-                    time.sleep(1); st.rerun()
+
+# Fragmento: os botões de um herói reexecutam só a sua linha; a página inteira
+# só é refeita quando o clique muda algo que ela precisa mostrar.
+@st.fragment
+def show_hero_row(row):
+    """Exibe um herói da lista com os botões de edição e exclusão."""
+    with st.container(border=True):
+        col1, col2, col3 = st.columns([3, 1, 1])
+        col1.markdown(f"**{row.hero_name}** (`{row.hero_team}`)")
+        col1.caption(f"ID: {row.hero_id} | Cadastrado em: {row.created_at_str}")
+
+        if col2.button("✏️ Editar", key=f"edit_{row.hero_id}", use_container_width=True):
+            st.session_state.editing_hero_id = row.hero_id
+            st.rerun(scope="app")
+        
+        if col3.button("🗑️ Excluir", key=f"del_{row.hero_id}", use_container_width=True, type="secondary"):
+            if delete_hero(row.hero_id):
+                st.toast(f"Herói '{row.hero_name}' excluído.", icon="✅")
+                st.rerun(scope="app")
 
 # =================================================================================
 # === 4. LÓGICA PRINCIPAL DA PÁGINA ===============================================
@@ -185,7 +214,12 @@ def show_page():
     st.header("🔑 Gestão de Heróis")
     st.subheader("Adicione, edite ou remova os heróis do programa.")
     
-    df_heroes = load_heroes()
+    try:
+        df_heroes = load_heroes()
+    except Exception as e:
+        # Sem a lista, os formulários não são exibidos: evita recadastrar heróis que já existem
+        st.error(f"Erro no banco de dados: {e}")
+        return
 
     if 'editing_hero_id' in st.session_state:
         hero_to_edit = df_heroes[df_heroes['hero_id'] == st.session_state.editing_hero_id]
@@ -1,16 +1,15 @@
 import streamlit as st
 import pandas as pd
-import psycopg2
-import os
-from dotenv import load_dotenv
-import time
 import base64
+import psycopg2
+from psycopg2.extras import execute_values
+from db import get_db_connection
+from auth import is_correct_password
+from csv_import import read_import_csv
 
 # =================================================================================
 # === 1. LÓGICA DE AUTENTICAÇÃO E CONFIGURAÇÃO INICIAL ============================
 # =================================================================================
-load_dotenv()
-
 def check_password():
     """Mostra o formulário de login e retorna True se a senha estiver correta."""
     if st.session_state.get("authenticated", False):
@@ -19,8 +18,7 @@ def check_password():
     st.warning("Por favor, insira a senha de administrador para acessar esta página.")
     password_input = st.text_input("Senha", type="password", key="password_input_missions")
     if st.button("Entrar"):
-        correct_password = os.getenv("ADMIN_PASSWORD")
-        if correct_password and password_input == correct_password:
+        if is_correct_password(password_input):
             st.session_state["authenticated"] = True
             st.rerun()
         else:
@@ -47,78 +45,137 @@ st.sidebar.button("🚪 Sair da Área Restrita", on_click=logout, use_container_
 # =================================================================================
 # === 2. FUNÇÕES DE BANCO DE DADOS (CRUD para Pilares e Missões) ==================
 # =================================================================================
-# (O resto do seu código permanece exatamente o mesmo)
-def get_db_connection():
-    """Cria e retorna uma NOVA conexão com o banco de dados."""
+# Conexões emprestadas do pool compartilhado em db.py
+# Esquema conhecido das tabelas de pilares e missões, aplicado na montagem do DataFrame
+ADMIN_DTYPES = {
+    'pillar_id': 'int32',
+    'mission_id': 'int32',
+    'crystals_reward': 'int32',
+    'pillar_name': 'string[pyarrow]',
+    'mission_name': 'string[pyarrow]',
+    'mission_describe': 'string[pyarrow]',
+    'pillar_image': 'object',
+}
+
+def execute_write(query, params=None):
+    """Executa um INSERT/UPDATE/DELETE parametrizado e confirma a transação."""
     try:
-        conn = psycopg2.connect(
-            host=os.getenv("SUPABASE_HOST"),
-            database=os.getenv("SUPABASE_DATABASE"),
-            user=os.getenv("SUPABASE_USER"),
-            password=os.getenv("SUPABASE_KEY"),
-            port=os.getenv("SUPABASE_PORT")
-        )
-        return conn
-    except psycopg2.OperationalError as e:
-        st.error(f"Erro de conexão com o banco de dados: {e}")
-        return None
-
-def execute_query(query, params=None, fetch=False):
-    """Função genérica para executar queries."""
-    conn = None
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                cur.execute(query, params)
+            conn.commit()
+            return True
+    except Exception as e:
+        # Escritas que falharam são desfeitas pelo pool ao receber a conexão de volta
+        st.error(f"Erro no banco de dados: {e}")
+        return False
+
+def execute_write_many(query, rows):
+    """Insere várias linhas com INSERT ... VALUES em lote: uma ida ao banco a cada 500 linhas."""
     try:
-        conn = get_db_connection()
-        if conn:
-            if fetch:
-                return pd.read_sql_query(query, conn, params=params)
-            else:
-                with conn.cursor() as cur:
-                    cur.execute(query, params)
-                conn.commit()
-                return True
-        return pd.DataFrame() if fetch else False
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
+                execute_values(cur, query, rows, page_size=500)
+            conn.commit()
+            return True
     except Exception as e:
-        if conn and not fetch: conn.rollback()
         st.error(f"Erro no banco de dados: {e}")
-        return pd.DataFrame() if fetch else False
-    finally:
-        if conn:
-            conn.close()
+        return False
+
+# --- Leitura de Pilares e Missões ---
+# Uma única consulta devolve as duas listas como arrays JSON: uma ida ao banco por carga.
+PILLAR_COLUMNS = ['pillar_id', 'pillar_name', 'pillar_image']
+MISSION_COLUMNS = ['mission_id', 'mission_name', 'mission_describe', 'crystals_reward', 'pillar_id', 'pillar_name']
+ADMIN_QUERY = """
+SELECT
+    (SELECT COALESCE(json_agg(p ORDER BY p.pillar_name), '[]')
+     FROM (SELECT pillar_id, pillar_name, encode(pillar_image, 'base64') AS pillar_image FROM dim_pillar) p) AS pillars,
+    (SELECT COALESCE(json_agg(m ORDER BY m.pillar_name, m.mission_name), '[]')
+     FROM (SELECT m.mission_id, COALESCE(m.mission_name, '') AS mission_name, COALESCE(m.mission_describe, '') AS mission_describe,
+                  COALESCE(m.crystals_reward, 0) AS crystals_reward, p.pillar_id, p.pillar_name
+           FROM dim_mission m
+           JOIN dim_pillar p ON m.pillar_id = p.pillar_id) m) AS missions;
+"""
+
+def _records_to_frame(records, columns, index):
+    """Monta o DataFrame com os tipos conhecidos, indexado pela chave primária (mantendo a coluna)."""
+    df = pd.DataFrame.from_records(records, columns=columns)
+    df = df.astype({col: ADMIN_DTYPES[col] for col in columns})
+    return df.set_index(index, drop=False)
+
+# O loader fica em cache e só é limpo pelas funções de escrita abaixo, após sucesso.
+@st.cache_data(ttl=300, show_spinner=False)
+def load_admin_data():
+    """
+    Retorna (df_pillars, df_missions) lidos numa única consulta.
+    Erros sobem para o show_page: o st.cache_data não guarda exceções, então uma
+    falha passageira não deixa as listas vazias presas no cache até o TTL.
+    """
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(ADMIN_QUERY)
+            pillars, missions = cur.fetchone()
+    # Dentro do JSON o ícone viaja em Base64 (encode no SQL), que não depende do
+    # bytea_output do servidor e ocupa menos que o texto hexadecimal do bytea
+    for pillar in pillars:
+        image = pillar['pillar_image']
+        pillar['pillar_image'] = base64.b64decode(image) if image else None
+    return (_records_to_frame(pillars, PILLAR_COLUMNS, 'pillar_id'),
+            _records_to_frame(missions, MISSION_COLUMNS, 'mission_id'))
 
-# --- CRUD para Pilares (dim_pillar) ---
-def load_pillars():
-    return execute_query("SELECT pillar_id, pillar_name, pillar_image FROM dim_pillar ORDER BY pillar_name", fetch=True)
 
-def add_pillar(name, image_base64=None):
-    return execute_query("INSERT INTO dim_pillar (pillar_name, pillar_image) VALUES (%s, %s)", params=(name, image_base64))
+# --- CRUD para Pilares (dim_pillar) ---
 
-def update_pillar(pillar_id, name, image_base64=None):
-    return execute_query("UPDATE dim_pillar SET pillar_name = %s, pillar_image = %s WHERE pillar_id = %s", params=(name, image_base64, int(pillar_id)))
+def add_pillar(name, image_bytes=None):
+    image = psycopg2.Binary(image_bytes) if image_bytes else None
+    success = execute_write("INSERT INTO dim_pillar (pillar_name, pillar_image) VALUES (%s, %s)", params=(name, image))
+    if success: load_admin_data.clear()
+    return success
+
+def add_pillars_bulk(rows):
+    """Insere vários pilares (tuplas nome, bytes do ícone ou None) numa única transação."""
+    rows = [(name, psycopg2.Binary(image_bytes) if image_bytes else None) for name, image_bytes in rows]
+    success = execute_write_many("INSERT INTO dim_pillar (pillar_name, pillar_image) VALUES %s", rows)
+    if success: load_admin_data.clear()
+    return success
+
+def update_pillar(pillar_id, name, image_bytes=None):
+    # Sem novo ícone, o COALESCE mantém o atual sem reenviar a imagem ao banco
+    image = psycopg2.Binary(image_bytes) if image_bytes else None
+    success = execute_write("UPDATE dim_pillar SET pillar_name = %s, pillar_image = COALESCE(%s, pillar_image) WHERE pillar_id = %s", params=(name, image, int(pillar_id)))
+    if success: load_admin_data.clear()
+    return success
 
 def delete_pillar(pillar_id):
-    return execute_query("DELETE FROM dim_pillar WHERE pillar_id = %s", params=(int(pillar_id),))
+    success = execute_write("DELETE FROM dim_pillar WHERE pillar_id = %s", params=(int(pillar_id),))
+    if success: load_admin_data.clear()
+    return success
 
 
 # --- CRUD para Missões (dim_mission) ---
-def load_missions_with_pillars():
-    query = """
-    SELECT m.mission_id, m.mission_name, m.mission_describe, m.crystals_reward, p.pillar_id, p.pillar_name
-    FROM dim_mission m
-    JOIN dim_pillar p ON m.pillar_id = p.pillar_id
-    ORDER BY p.pillar_name, m.mission_name;
-    """
-    return execute_query(query, fetch=True)
-
 def add_mission(name, describe, reward, pillar_id):
     query = "INSERT INTO dim_mission (mission_name, mission_describe, crystals_reward, pillar_id) VALUES (%s, %s, %s, %s)"
-    return execute_query(query, params=(name, describe, int(reward), int(pillar_id)))
+    success = execute_write(query, params=(name, describe, int(reward), int(pillar_id)))
+    if success: load_admin_data.clear()
+    return success
+
+def add_missions_bulk(rows):
+    """Insere várias missões (tuplas nome, descrição, recompensa, pillar_id) numa única transação."""
+    query = "INSERT INTO dim_mission (mission_name, mission_describe, crystals_reward, pillar_id) VALUES %s"
+    success = execute_write_many(query, rows)
+    if success: load_admin_data.clear()
+    return success
 
 def update_mission(mission_id, name, describe, reward, pillar_id):
     query = "UPDATE dim_mission SET mission_name=%s, mission_describe=%s, crystals_reward=%s, pillar_id=%s WHERE mission_id=%s"
-    return execute_query(query, params=(name, describe, int(reward), int(pillar_id), int(mission_id)))
+    success = execute_write(query, params=(name, describe, int(reward), int(pillar_id), int(mission_id)))
+    if success: load_admin_data.clear()
+    return success
 
 def delete_mission(mission_id):
-    return execute_query("DELETE FROM dim_mission WHERE mission_id = %s", params=(int(mission_id),))
+    success = execute_write("DELETE FROM dim_mission WHERE mission_id = %s", params=(int(mission_id),))
+    if success: load_admin_data.clear()
+    return success
 
 
 # =================================================================================
@@ -134,28 +191,52 @@ def manage_pillars(df_pillars):
             image_file = st.file_uploader("Ícone do Pilar (Opcional)", type=['png', 'jpg', 'jpeg', 'svg'])
             if st.form_submit_button("Adicionar Pilar", type="primary"):
                 if name.strip():
-                    img_b64 = base64.b64encode(image_file.getvalue()).decode('utf-8') if image_file else None
-                    if add_pillar(name.strip(), img_b64):
-                        st.success("Pilar adicionado!"); time.sleep(1); st.rerun()
+                    if add_pillar(name.strip(), image_file.getvalue() if image_file else None):
+                        st.toast("Pilar adicionado!", icon="✅"); st.rerun()
                 else:
                     st.warning("O nome do pilar é obrigatório.")
-    
+
+        st.markdown("##### 📥 Importar vários pilares (CSV)")
+        csv_file = st.file_uploader("Arquivo CSV com a coluna `pillar_name`", type=['csv'], key="pillars_csv")
+        if csv_file and st.button("📥 Importar Pilares", use_container_width=True):
+            df_csv = read_import_csv(csv_file, ['pillar_name'])
+            if df_csv is not None and add_pillars_bulk([(name, None) for name in df_csv['pillar_name']]):
+                st.toast(f"{len(df_csv)} pilares importados com sucesso!", icon="✅")
+                st.rerun()
+
     st.markdown("#### Pilares Existentes")
-    for _, row in df_pillars.iterrows():
-        with st.container(border=True):
-            c1, c2, c3 = st.columns([3, 1, 1])
-            if row['pillar_image']:
-                try:
-                    img_bytes = base64.b64decode(row['pillar_image'])
-                    c1.image(img_bytes, width=40)
-                except:
-                    c1.write("🖼️") # Fallback
-            c1.write(f"**{row['pillar_name']}** (ID: {row['pillar_id']})")
-            if c2.button("✏️ Editar", key=f"edit_p_{row['pillar_id']}", use_container_width=True):
-                 st.session_state.editing_pillar_id = row['pillar_id']
-            if c3.button("🗑️ Excluir", key=f"del_p_{row['pillar_id']}", use_container_width=True):
-                if delete_pillar(row['pillar_id']):
-                    st.success("Pilar excluído!"); time.sleep(1); st.rerun()
+    for row in df_pillars.itertuples(index=False):
+        show_pillar_row(row)
+
+# Assinaturas dos formatos aceitos no upload de ícones
+_IMAGE_SIGNATURES = ((b'\x89PNG', 'image/png'), (b'\xff\xd8', 'image/jpeg'), (b'<svg', 'image/svg+xml'), (b'<?xml', 'image/svg+xml'))
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _image_data_url(img_bytes):
+    """
+    Converte o ícone em data URL uma única vez; o <img> vai direto no markdown,
+    sem o st.image abrir a imagem com o Pillow e registrá-la como mídia a cada rerun.
+    """
+    mime = next((mime for sig, mime in _IMAGE_SIGNATURES if img_bytes.lstrip()[:len(sig)] == sig), 'image/png')
+    return f"data:{mime};base64,{base64.b64encode(img_bytes).decode()}"
+
+# Fragmentos: os botões de um pilar/missão reexecutam só a sua linha; a página inteira
+# só é refeita quando o clique muda algo que ela precisa mostrar.
+@st.fragment
+def show_pillar_row(row):
+    """Exibe um pilar da lista com os botões de edição e exclusão."""
+    with st.container(border=True):
+        c1, c2, c3 = st.columns([3, 1, 1])
+        img_bytes = row.pillar_image  # bytea: já chega como bytes (ou None), sem decodificar
+        if isinstance(img_bytes, bytes) and img_bytes:
+            c1.markdown(f'<img src="{_image_data_url(img_bytes)}" width="40">', unsafe_allow_html=True)
+        c1.write(f"**{row.pillar_name}** (ID: {row.pillar_id})")
+        if c2.button("✏️ Editar", key=f"edit_p_{row.pillar_id}", use_container_width=True):
+            st.session_state.editing_pillar_id = row.pillar_id
+            st.rerun(scope="app")
+        if c3.button("🗑️ Excluir", key=f"del_p_{row.pillar_id}", use_container_width=True):
+            if delete_pillar(row.pillar_id):
+                st.toast("Pilar excluído!", icon="✅"); st.rerun(scope="app")
 
 def edit_pillar_form(pillar_data):
     st.info(f"✏️ Editando Pilar: **{pillar_data['pillar_name']}**")
@@ -164,15 +245,19 @@ def edit_pillar_form(pillar_data):
         image_file = st.file_uploader("Substituir Ícone (Opcional)", type=['png', 'jpg', 'jpeg', 'svg'])
         c1, c2 = st.columns(2)
         if c1.form_submit_button("💾 Salvar", type="primary", use_container_width=True):
-            img_b64 = base64.b64encode(image_file.getvalue()).decode('utf-8') if image_file else pillar_data['pillar_image']
-            if update_pillar(pillar_data['pillar_id'], name.strip(), img_b64):
-                st.success("Pilar atualizado!"); del st.session_state.editing_pillar_id; time.sleep(1); st.rerun()
+            if update_pillar(pillar_data['pillar_id'], name.strip(), image_file.getvalue() if image_file else None):
+                st.toast("Pilar atualizado!", icon="✅"); del st.session_state.editing_pillar_id; st.rerun()
         if c2.form_submit_button("❌ Cancelar", use_container_width=True):
             del st.session_state.editing_pillar_id; st.rerun()
 
 
 # --- Seção de Gerenciamento de Missões ---
-def manage_missions(df_missions, df_pillars):
+@st.cache_data(max_entries=8, show_spinner=False)
+def _pillar_map(names, ids):
+    """Nome do pilar -> pillar_id para os selectboxes; montado uma vez enquanto os pilares não mudam."""
+    return dict(zip(names, ids))
+
+def manage_missions(df_missions, df_pillars, pillar_map):
     st.markdown("## 🎯 Gerenciar Missões")
     
     if df_pillars.empty:
@@ -185,41 +270,68 @@ def manage_missions(df_missions, df_pillars):
             describe = st.text_area("Descrição da Missão")
             c1, c2 = st.columns(2)
             reward = c1.number_input("Recompensa em Cristais 💎", min_value=1, step=1, value=10)
-            
-            pillar_map = {name: id for id, name in zip(df_pillars['pillar_id'], df_pillars['pillar_name'])}
             selected_pillar_name = c2.selectbox("Pilar Associado", options=pillar_map.keys())
             
             if st.form_submit_button("Adicionar Missão", type="primary"):
                 if name.strip() and describe.strip() and selected_pillar_name:
                     pillar_id = pillar_map[selected_pillar_name]
                     if add_mission(name.strip(), describe.strip(), reward, pillar_id):
-                        st.success("Missão adicionada!"); time.sleep(1); st.rerun()
+                        st.toast("Missão adicionada!", icon="✅"); st.rerun()
                 else:
                     st.warning("Todos os campos são obrigatórios.")
 
+        st.markdown("##### 📥 Importar várias missões (CSV)")
+        csv_file = st.file_uploader("Arquivo CSV com as colunas `mission_name`, `mission_describe`, `crystals_reward` e `pillar_name`", type=['csv'], key="missions_csv")
+        if csv_file and st.button("📥 Importar Missões", use_container_width=True):
+            df_csv = read_import_csv(csv_file, ['mission_name', 'mission_describe', 'crystals_reward', 'pillar_name'])
+            if df_csv is not None:
+                import_missions(df_csv, pillar_map)
+
     st.markdown("#### Missões Existentes")
-    for p_name in df_missions['pillar_name'].unique():
+    # Um único groupby (na ordem da consulta) em vez de um filtro booleano por pilar
+    for p_name, group in df_missions.groupby('pillar_name', sort=False):
         st.markdown(f"##### 🏛️ {p_name}")
-        for _, row in df_missions[df_missions['pillar_name'] == p_name].iterrows():
-            with st.container(border=True):
-                c1, c2, c3 = st.columns([4, 1, 1])
-                c1.write(f"**{row['mission_name']}** (+{row['crystals_reward']}💎)")
-                c1.caption(row['mission_describe'])
-                if c2.button("✏️ Editar", key=f"edit_m_{row['mission_id']}", use_container_width=True):
-                    st.session_state.editing_mission_id = row['mission_id']
-                if c3.button("🗑️ Excluir", key=f"del_m_{row['mission_id']}", use_container_width=True):
-                    if delete_mission(row['mission_id']):
-                        st.success("Missão excluída!"); time.sleep(1); st.rerun()
-
-def edit_mission_form(mission_data, df_pillars):
+        for row in group.itertuples(index=False):
+            show_mission_row(row)
+
+def import_missions(df_csv, pillar_map):
+    """Valida as linhas do CSV de missões (pilar existente, recompensa positiva) e insere em lote."""
+    rewards = pd.to_numeric(df_csv['crystals_reward'], errors='coerce')
+    unknown = sorted(set(df_csv['pillar_name']) - set(pillar_map))
+    if unknown:
+        st.warning(f"Pilares não encontrados: {', '.join(unknown)}")
+    elif (invalid := rewards.isna() | (rewards < 1) | (rewards % 1 != 0)).any():
+        # Índice do DataFrame + 2 = linha no arquivo (o cabeçalho é a linha 1)
+        lines = ', '.join(str(i + 2) for i in df_csv.index[invalid])
+        st.warning(f"A coluna `crystals_reward` precisa conter inteiros positivos (linhas do arquivo: {lines}).")
+    else:
+        rows = [(name, describe, int(reward), pillar_map[p_name]) for name, describe, reward, p_name
+                in zip(df_csv['mission_name'], df_csv['mission_describe'], rewards, df_csv['pillar_name'])]
+        if add_missions_bulk(rows):
+            st.toast(f"{len(rows)} missões importadas com sucesso!", icon="✅")
+            st.rerun()
+
+@st.fragment
+def show_mission_row(row):
+    """Exibe uma missão da lista com os botões de edição e exclusão."""
+    with st.container(border=True):
+        c1, c2, c3 = st.columns([4, 1, 1])
+        c1.write(f"**{row.mission_name}** (+{row.crystals_reward}💎)")
+        c1.caption(row.mission_describe)
+        if c2.button("✏️ Editar", key=f"edit_m_{row.mission_id}", use_container_width=True):
+            st.session_state.editing_mission_id = row.mission_id
+            st.rerun(scope="app")
+        if c3.button("🗑️ Excluir", key=f"del_m_{row.mission_id}", use_container_width=True):
+            if delete_mission(row.mission_id):
+                st.toast("Missão excluída!", icon="✅"); st.rerun(scope="app")
+
+def edit_mission_form(mission_data, pillar_map):
     st.info(f"✏️ Editando Missão: **{mission_data['mission_name']}**")
     with st.form(f"edit_mission_{mission_data['mission_id']}"):
         name = st.text_input("Novo Nome", value=mission_data['mission_name'])
         describe = st.text_area("Nova Descrição", value=mission_data['mission_describe'])
         c1, c2 = st.columns(2)
         reward = c1.number_input("Nova Recompensa 💎", min_value=1, step=1, value=mission_data['crystals_reward'])
-        
-        pillar_map = {name: id for id, name in zip(df_pillars['pillar_id'], df_pillars['pillar_name'])}
         pillar_names = list(pillar_map.keys())
         current_pillar_index = pillar_names.index(mission_data['pillar_name']) if mission_data['pillar_name'] in pillar_names else 0
         selected_pillar_name = c2.selectbox("Novo Pilar", options=pillar_names, index=current_pillar_index)
@@ -228,7 +340,7 @@ def edit_mission_form(mission_data, df_pillars):
         if sc1.form_submit_button("💾 Salvar", type="primary", use_container_width=True):
             pillar_id = pillar_map[selected_pillar_name]
             if update_mission(mission_data['mission_id'], name.strip(), describe.strip(), reward, pillar_id):
-                st.success("Missão atualizada!"); del st.session_state.editing_mission_id; time.sleep(1); st.rerun()
+                st.toast("Missão atualizada!", icon="✅"); del st.session_state.editing_mission_id; st.rerun()
         if sc2.form_submit_button("❌ Cancelar", use_container_width=True):
             del st.session_state.editing_mission_id; st.rerun()
 
@@ -240,24 +352,29 @@ def show_page():
     st.header("🔑 Administração de Missões")
     st.subheader("Gerencie os pilares, missões e suas recompensas.")
     
-    df_pillars = load_pillars()
-    df_missions = load_missions_with_pillars()
+    try:
+        df_pillars, df_missions = load_admin_data()
+    except Exception as e:
+        # Sem as listas, os formulários não são exibidos: evita recriar pilares e missões que já existem
+        st.error(f"Erro no banco de dados: {e}")
+        return
+    pillar_map = _pillar_map(tuple(df_pillars['pillar_name'].tolist()), tuple(df_pillars['pillar_id'].tolist()))
 
     tab1, tab2 = st.tabs(["Gerenciar Pilares", "Gerenciar Missões"])
 
     with tab1:
         if 'editing_pillar_id' in st.session_state:
-            pillar_data = df_pillars[df_pillars['pillar_id'] == st.session_state.editing_pillar_id].iloc[0]
+            pillar_data = df_pillars.loc[st.session_state.editing_pillar_id]
             edit_pillar_form(pillar_data)
         else:
             manage_pillars(df_pillars)
 
     with tab2:
         if 'editing_mission_id' in st.session_state:
-            mission_data = df_missions[df_missions['mission_id'] == st.session_state.editing_mission_id].iloc[0]
-            edit_mission_form(mission_data, df_pillars)
+            mission_data = df_missions.loc[st.session_state.editing_mission_id]
+            edit_mission_form(mission_data, pillar_map)
         else:
-            manage_missions(df_missions, df_pillars)
+            manage_missions(df_missions, df_pillars, pillar_map)
 
 # --- Ponto de Entrada da Aplicação ---
 if __name__ == "__main__":
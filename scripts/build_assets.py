@@ -0,0 +1,31 @@
+# scripts/build_assets.py
+"""
+Gera os arquivos estáticos otimizados servidos pelo app.
+
+Execute a partir da raiz do repositório sempre que a imagem original mudar:
+    python scripts/build_assets.py
+"""
+
+from pathlib import Path
+from PIL import Image
+
+# --- Configuração ---
+ROOT = Path(__file__).resolve().parent.parent
+STATIC_DIR = ROOT / "static"
+
+# O banner ocupa a coluna estreita da Home; 800px cobre telas de alta densidade.
+BANNER_SOURCE = STATIC_DIR / "Capa.png"
+BANNER_TARGET = STATIC_DIR / "Capa.webp"
+BANNER_MAX_SIZE = (800, 800)
+
+
+def build_banner():
+    """Reduz o banner ao tamanho exibido e o converte para WebP."""
+    with Image.open(BANNER_SOURCE) as im:
+        im.thumbnail(BANNER_MAX_SIZE, Image.LANCZOS)
+        im.save(BANNER_TARGET, "WEBP", quality=82, method=6)
+    print(f"✅ {BANNER_TARGET.name}: {BANNER_SOURCE.stat().st_size:,} → {BANNER_TARGET.stat().st_size:,} bytes")
+
+
+if __name__ == "__main__":
+    build_banner()